@@ -0,0 +1,136 @@
+import threading
+import traceback
+from collections import deque, namedtuple
+from time import monotonic
+
+from .Gramophone import GramophoneError
+
+Sample = namedtuple('Sample', ['time', 'values'])
+Sample.__doc__ = """ Values read from a Gramophone, and when they were read
+    (time.monotonic in seconds). """
+
+
+class Acquisition(object):
+    """
+    Reads a Gramophone at a fixed rate in a background thread, so reading
+    doesn't wait for the device. The newest sample is kept in a slot that
+    is replaced with every read, so it can be read at any time without a
+    lock, and the recent samples are kept in a history ring.
+
+    :param read: Reads the device and returns the values, eg.
+        Gramophone.read_linmaze_params.
+    :type read: function
+
+    :param rate: How many times the device is read in a second.
+        200 by default.
+    :type rate: float
+
+    :param history: How many of the recent samples are kept.
+        1000 by default.
+    :type history: int
+
+    :param callback: Called with every new sample in the background
+        thread. None by default.
+    :type callback: function or None
+
+    Any error other than a GramophoneError, eg. raised by the callback,
+    stops the reading. It is printed and kept in the error attribute, so
+    the thread that started the Acquisition can handle it.
+    """
+
+    def __init__(self, read, rate=200, history=1000, callback=None):
+        self.read = read
+        self.callback = callback
+        self.rate = rate
+        self.latest = None
+        self.history = deque(maxlen=history)
+        self.errors = 0
+        self.error = None  # The error that stopped the reading
+        self.thread = None
+        self.first_sample = threading.Event()
+        self.stopping = threading.Event()
+
+    def start(self):
+        """ Starts reading the device in the background. """
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """ Stops reading the device and waits for the last read to end. """
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def wait(self, timeout=None):
+        """
+        Waits until the first sample is read.
+
+        :param timeout: How long to wait at most in seconds. Wait for ever
+            if None. None by default.
+        :type timeout: float or None
+
+        :returns: The first sample or None if it wasn't read in time.
+        :rtype: Sample or None
+        """
+        self.first_sample.wait(timeout)
+        return self.latest
+
+    def run(self):
+        """ Reads the device until stopped. Runs in the background thread. """
+        period = 1 / self.rate
+        next_read = monotonic()
+        while not self.stopping.is_set():
+            try:
+                values = self.read()
+            except GramophoneError as err:
+                self.errors += 1
+                print("Communication ERROR:", err)
+                print("Using the previously read values.")
+            except Exception as err:
+                self.fail(err)
+                return
+            else:
+                sample = Sample(monotonic(), values)
+                self.history.append(sample)
+                self.latest = sample  # Replacing the slot is atomic
+                self.first_sample.set()
+                if self.callback is not None:
+                    try:
+                        self.callback(sample)
+                    except Exception as err:
+                        self.fail(err)
+                        return
+
+            next_read += period
+            now = monotonic()
+            if next_read < now:
+                # Late by more than a period, don't try to catch up
+                next_read = now
+            self.stopping.wait(next_read - now)
+
+    def fail(self, err):
+        """
+        Prints an error that stops the reading and keeps it. Runs in the
+        background thread.
+
+        :param err: The error.
+        :type err: Exception
+        """
+        print("Acquisition stopped by an ERROR:")
+        traceback.print_exc()
+        self.error = err
+        self.first_sample.set()  # Don't keep wait waiting
+
+    def recent(self, seconds):
+        """
+        The samples of the last seconds, the oldest first.
+
+        :param seconds: How far back to look.
+        :type seconds: float
+
+        :rtype: [Sample]
+        """
+        since = monotonic() - seconds
+        return [sample for sample in list(self.history) if sample.time >= since]
@@ -0,0 +1,133 @@
+import queue
+import threading
+
+from .Gramophone import GramophoneError
+
+
+class CommandQueue(object):
+    """
+    Sends commands to a Gramophone in a background thread, so the thread
+    that gives a command doesn't wait for the device. The states of the
+    digital outputs are cached when they are written, so they can be
+    told without reading the device, and a write that would not change
+    the state of an output is not sent at all. Which outputs are bursting
+    is cached the same way when the bursts are started and stopped.
+
+    The cache is also updated from the values read from the device (see
+    sync), so outputs changed by other means (eg. bursts) are followed.
+
+    :param gramophone: The device the commands are sent to.
+    :type gramophone: Gramophone
+    """
+
+    def __init__(self, gramophone):
+        self.gramophone = gramophone
+        self.outputs = {1: 0, 2: 0, 3: 0, 4: 0}
+        self.bursting = {1: False, 2: False, 3: False, 4: False}
+        self.commands = queue.Queue()
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.thread = None
+
+    def start(self):
+        """ Starts sending the commands in the background. """
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """ Sends the commands queued so far and stops. """
+        if self.thread is not None:
+            self.commands.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def write_output(self, output, value):
+        """
+        Sets a digital output, unless it is already in the given state.
+
+        :param output: The output to set (1 to 4)
+        :type output: int
+
+        :param value: The state to set (1 is high, 0 is low)
+        :type value: int
+        """
+        value = int(value)
+        with self.lock:
+            if self.outputs[output] == value:
+                self.coalesced += 1
+                return
+            self.outputs[output] = value
+            self.queued += 1
+        self.commands.put((self.gramophone.write_output, (output, value)))
+
+    def start_burst(self, output, on_time, pause_time):
+        """
+        Starts turning a digital output on and off, unless it is already
+        bursting. See Gramophone.start_burst.
+
+        :param output: The output to burst (1 to 4)
+        :type output: int
+
+        :param on_time: How long the output is on in seconds.
+        :type on_time: float
+
+        :param pause_time: How long the output is off in seconds.
+        :type pause_time: float
+        """
+        with self.lock:
+            if self.bursting[output]:
+                self.coalesced += 1
+                return
+            self.bursting[output] = True
+            self.queued += 1
+        self.commands.put((self.gramophone.start_burst,
+                           (output, on_time, pause_time)))
+
+    def stop_burst(self, output):
+        """
+        Stops the bursts of a digital output, unless it is not bursting.
+
+        :param output: The output to stop (1 to 4)
+        :type output: int
+        """
+        with self.lock:
+            if not self.bursting[output]:
+                self.coalesced += 1
+                return
+            self.bursting[output] = False
+            self.queued += 1
+        self.commands.put((self.gramophone.stop_burst, (output,)))
+
+    def sync(self, values, sent):
+        """
+        Updates the cached output states from values read from the device,
+        if no write was waiting or sent while they were read.
+
+        :param values: The values read, with 'DO-1' ... 'DO-4' among them.
+        :type values: dict
+
+        :param sent: The number of commands sent before the read started.
+        :type sent: int
+        """
+        with self.lock:
+            if self.queued == self.sent == sent:
+                for output in self.outputs:
+                    self.outputs[output] = int(values['DO-' + str(output)])
+
+    def run(self):
+        """ Sends the commands until stopped. Runs in the background thread. """
+        while True:
+            command = self.commands.get()
+            if command is None:
+                return
+            function, args = command
+            try:
+                function(*args)
+            except GramophoneError as err:
+                self.errors += 1
+                print("Communication ERROR:", err)
+            with self.lock:
+                self.sent += 1
@@ -189,6 +189,8 @@ class Gramophone(object):
                          4: False}
 
         self.readers = []
+        # A command and its response are not mixed up with another thread's
+        self.lock = threading.Lock()
 
     def decode_payload(self, param_id, payload):
         """
@@ -588,13 +590,14 @@ class Gramophone(object):
         :ptype packet: Packet
         """
         try:
-            self.device.write(0x01, packet.encoded)
-            while True:
-                resp = Packet.from_array(self.device.read(0x81, 64))
-                if resp.target == self.source and \
-                        resp.source == self.target and \
-                        resp.msn == packet.msn:
-                    return resp
+            with self.lock:
+                self.device.write(0x01, packet.encoded)
+                while True:
+                    resp = Packet.from_array(self.device.read(0x81, 64))
+                    if resp.target == self.source and \
+                            resp.source == self.target and \
+                            resp.msn == packet.msn:
+                        return resp
 
         except usb.core.USBError as usb_error:
             raise GramophoneError(usb_error)
@@ -1 +1,3 @@
-from .Gramophone import Gramophone, GramophoneError, find_devices
\ No newline at end of file
+from .Gramophone import Gramophone, GramophoneError, find_devices
+from .Acquisition import Acquisition, Sample
+from .CommandQueue import CommandQueue
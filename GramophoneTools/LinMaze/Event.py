@@ -13,12 +13,32 @@ class Event(ABC):
     def __init__(self, level):
         self.level = level
         self.session = None
+        self.name = None  # Set by the Session
         self.trigger_count = 0
 
     def trigger(self):
-        ''' Triggers the Event. Prints Event information. '''
+        ''' Triggers the Event. Logs Event information. '''
         self.trigger_count += 1
-        print(self, "["+str(self.trigger_count)+"]", '\n')
+        self.log('event', str(self) + " [" + str(self.trigger_count) + "]")
+
+    def log(self, kind, message, rule=None):
+        '''
+        Logs something about this Event in the Session, or prints it if the
+        Event is not used in a Session.
+
+        :param kind: What happened, see LinMaze.EventLog.LogEntry.
+        :type kind: str
+
+        :param message: The message shown in the console.
+        :type message: str
+
+        :param rule: The Rule that triggered the Event, if any.
+        :type rule: Rule or None
+        '''
+        if self.session is None:
+            print(message)
+        else:
+            self.session.log_event(kind, message, rule, self)
 
     @abstractproperty
     def triggerable(self):
@@ -105,8 +125,7 @@ class PortOn(Event):
         self.port = port
 
     def trigger(self):
-        self.session.gramophone.write_output(self.port, 1)
-        self.session.gramophone.read_outputs()
+        self.session.commands.write_output(self.port, 1)
         super().trigger()
 
     def __str__(self):
@@ -114,14 +133,7 @@ class PortOn(Event):
 
     @property
     def triggerable(self):
-        if self.port == 1:
-            return not bool(self.session.last_read['DO-1'])
-        if self.port == 2:
-            return not bool(self.session.last_read['DO-2'])
-        if self.port == 3:
-            return not bool(self.session.last_read['DO-3'])
-        if self.port == 4:
-            return not bool(self.session.last_read['DO-4'])
+        return not bool(self.session.commands.outputs[self.port])
 
 
 class PortOff(Event):
@@ -140,20 +152,12 @@ class PortOff(Event):
         self.port = port
 
     def trigger(self):
-        self.session.gramophone.write_output(self.port, 0)
-        self.session.gramophone.read_outputs()
+        self.session.commands.write_output(self.port, 0)
         super().trigger()
 
     @property
     def triggerable(self):
-        if self.port == 1:
-            return bool(self.session.last_read['DO-1'])
-        if self.port == 2:
-            return bool(self.session.last_read['DO-2'])
-        if self.port == 3:
-            return bool(self.session.last_read['DO-3'])
-        if self.port == 4:
-            return bool(self.session.last_read['DO-4'])
+        return bool(self.session.commands.outputs[self.port])
 
     def __str__(self):
         return "Turn OFF port " + str(self.port)
@@ -184,13 +188,13 @@ class StartBurst(Event):
         self.pause_time = pause_time
 
     def trigger(self):
-        self.session.gramophone.start_burst(
+        self.session.commands.start_burst(
             self.port, self.on_time, self.pause_time)
         super().trigger()
 
     @property
     def triggerable(self):
-        return not self.session.gramophone.bursting[self.port]
+        return not self.session.commands.bursting[self.port]
 
     def __str__(self):
         return "Start " + str(self.on_time) + " sec bursts with " \
@@ -213,13 +217,13 @@ class StopBurst(Event):
         self.port = port
 
     def trigger(self):
-        self.session.gramophone.stop_burst(self.port)
+        self.session.commands.stop_burst(self.port)
         super().trigger()
 
         # print("Bursting is already off on port", self.port, '\n')
     @property
     def triggerable(self):
-        return self.session.gramophone.bursting[self.port]
+        return self.session.commands.bursting[self.port]
 
     def __str__(self):
         return "Stop the bursts on port " + str(self.port)
@@ -0,0 +1,132 @@
+"""Logs what happens in a Session without waiting for the console or the disk."""
+import queue
+import threading
+from collections import namedtuple
+from time import monotonic
+
+import h5py
+import numpy as np
+
+LogEntry = namedtuple('LogEntry', ['time', 'g_time', 'kind', 'level', 'rule',
+                                   'event', 'position', 'zone', 'message'])
+LogEntry.__doc__ = """ Something that happened in a Session: a Rule or an
+    Event triggered ('rule' or 'event'), a 'message' or an 'error'. The
+    rule is the index of the Rule in its Level (-1 if none), the event is
+    the name of the Event ('' if none). """
+
+# The rows of the events table of the log file
+EVENT_DTYPE = np.dtype([('time', np.float64),
+                        ('g_time', np.uint64),
+                        ('kind', h5py.string_dtype()),
+                        ('level', h5py.string_dtype()),
+                        ('rule', np.int32),
+                        ('event', h5py.string_dtype()),
+                        ('position', np.float64),
+                        ('zone', np.int32),
+                        ('message', h5py.string_dtype())])
+
+
+class EventLog(object):
+    """Collects LogEntries from the thread that steps a Session through a
+    queue that never blocks it. A background thread writes them into the
+    events table of the log file in batches, and prints their messages to
+    the console, at most echo_rate of them in a second, so a burst of
+    events doesn't flood the console. How many were not printed is told
+    once a second.
+
+    :param dataset: The events table of the log file (see EVENT_DTYPE), or
+        None to only print the messages. None by default.
+    :type dataset: h5py.Dataset or None
+
+    :param echo_rate: How many messages are printed in a second at most.
+        20 by default.
+    :type echo_rate: int
+
+    :param flush_interval: How often the entries are written to the file
+        in seconds. 1 by default.
+    :type flush_interval: float
+    """
+
+    def __init__(self, dataset=None, echo_rate=20, flush_interval=1):
+        self.dataset = dataset
+        self.echo_rate = echo_rate
+        self.flush_interval = flush_interval
+        self.entries = queue.SimpleQueue()
+        self.batch = []
+        self.echo_start = None  # When the second of the printed messages started
+        self.echoed = 0
+        self.suppressed = 0
+        self.thread = None
+
+    def start(self):
+        """ Starts writing the entries in the background. """
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """ Writes the entries added so far and stops. """
+        if self.thread is not None:
+            self.entries.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def add(self, entry):
+        """
+        Adds an entry to the log, without waiting.
+
+        :param entry: What happened.
+        :type entry: LogEntry
+        """
+        self.entries.put(entry)
+
+    def run(self):
+        """ Writes and prints the entries until stopped. Runs in the
+        background thread. """
+        next_flush = monotonic() + self.flush_interval
+        while True:
+            try:
+                entry = self.entries.get(timeout=max(next_flush - monotonic(), 0))
+            except queue.Empty:
+                pass
+            else:
+                if entry is None:
+                    break
+                self.batch.append(entry)
+                self.echo(entry)
+            if monotonic() >= next_flush:
+                self.flush()
+                self.echo()
+                next_flush = monotonic() + self.flush_interval
+        self.flush()
+        if self.suppressed:
+            print("...", self.suppressed, "more log entries not shown")
+
+    def echo(self, entry=None):
+        """
+        Prints the message of an entry, unless too many were printed in the
+        last second. Tells how many were not printed when the second is over.
+
+        :param entry: The entry to print, or None to only check the time.
+        :type entry: LogEntry or None
+        """
+        now = monotonic()
+        if self.echo_start is None or now - self.echo_start >= 1:
+            if self.suppressed:
+                print("...", self.suppressed, "more log entries not shown")
+            self.echo_start, self.echoed, self.suppressed = now, 0, 0
+        if entry is None:
+            return
+        if self.echoed < self.echo_rate:
+            print(entry.message)
+            self.echoed += 1
+        else:
+            self.suppressed += 1
+
+    def flush(self):
+        """ Writes the entries collected into the events table. """
+        if self.dataset is not None and self.batch:
+            rows = np.array([tuple(entry) for entry in self.batch],
+                            dtype=EVENT_DTYPE)
+            self.dataset.resize(self.dataset.shape[0] + len(rows), axis=0)
+            self.dataset[-len(rows):] = rows
+        self.batch = []
@@ -1,42 +1,305 @@
 """Everything related to making LinMaze Frames."""
 import os
 import math
-from time import sleep
+import atexit
+import hashlib
+import threading
+from collections import Counter
 from multiprocessing import Pool
 
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
 import cv2
 import dill as pickle
 import numpy as np
 from PIL import Image
 
+import GramophoneTools
 from GramophoneTools.LinMaze import perlin
 from GramophoneTools.LinMaze.Tools import Stopwatch, progressbar
+from GramophoneTools.LinMaze.Tools.TextureCache import TextureCache
+
+texture_cache = TextureCache()
+
+BLOCK_ROWS = 64  # Rows of a Frame generated at a time
+
+
+def set_texture_cache(cache):
+    """Sets where rendered Frames are stored and loaded from.
+
+    :param cache: The cache that should be used. Set to None to disable caching.
+    :type cache: TextureCache or None
+    """
+    global texture_cache
+    texture_cache = cache
+
 
+_render_pool = None
 
-def multi_make(list_of_frames):
+
+def render_pool():
+    """The pool of worker processes Frames are rendered in. It is started
+    when it is first needed and kept running until the program exits, so
+    the workers only have to be started (and import everything) once."""
+    global _render_pool
+    if _render_pool is None:
+        if shared_memory is not None and os.name == 'posix':
+            # The workers must share the parent's resource tracker or they
+            # would unlink the shared memory blocks when they exit
+            resource_tracker.ensure_running()
+        _render_pool = Pool()
+        atexit.register(shutdown_render_pool)
+    return _render_pool
+
+
+def shutdown_render_pool():
+    """Stops the worker processes of the render pool after they finished
+    their current jobs. A new pool is started if Frames are rendered again."""
+    global _render_pool
+    if _render_pool is not None:
+        atexit.unregister(shutdown_render_pool)
+        _render_pool.close()
+        _render_pool.join()
+        _render_pool = None
+
+
+def multi_make(list_of_frames, use_shared_memory=True):
     """Renders a list of frames with multiprocessing.
 
     :param list_of_frames: A list of Frame objects that should be rendered.
     :type list_of_frames: [Frame]
 
-    :returns: A list of rendered Frames.
+    :param use_shared_memory: Should the worker processes pass the textures
+        back in shared memory instead of pickling them? Needs Python 3.8 or
+        newer. True by default.
+    :type use_shared_memory: bool
+
+    :returns: A list of rendered Frames. Frames that look the same share
+        one read-only texture.
+    """
+
+    if not list_of_frames:
+        return []
+
+    # Frames that look the same are only rendered once
+    renders, sources, first_render = [], [], {}
+    for frame in list_of_frames:
+        key = frame.cache_key
+        if key is not None and key in first_render:
+            sources.append(first_render[key])
+            continue
+        if key is not None:
+            first_render[key] = len(renders)
+        sources.append(len(renders))
+        renders.append(frame)
+
+    frames = _render(renders, use_shared_memory)
+
+    for source, count in Counter(sources).items():
+        if count > 1:
+            # Shared textures must not be changed in place
+            shared = frames[source].texture.view()
+            shared.flags.writeable = False
+            frames[source].texture = shared
+
+    made_frames, used = [], set()
+    for frame, source in zip(list_of_frames, sources):
+        if source in used:
+            frame.texture = frames[source].texture
+            frame.made = True
+            made_frames.append(frame)
+        else:
+            used.add(source)
+            made_frames.append(frames[source])
+    return made_frames
+
+
+def _render(list_of_frames, use_shared_memory):
+    """Renders the frames in the render pool, see multi_make."""
+    total_bytes = sum(frame.texture_nbytes for frame in list_of_frames)
+    blocks = [None] * len(list_of_frames)
+    if use_shared_memory and shared_memory is not None and \
+            _shared_memory_fits(total_bytes):
+        blocks = [shared_memory.SharedMemory(create=True, size=max(1, frame.texture_nbytes))
+                  for frame in list_of_frames]
+
+    frames = [None] * len(list_of_frames)
+    finished = threading.Condition()
+    done = 0
+    outstanding = 0  # Jobs in the pool that may still write into a block
+    error = None
+
+    def completed(index, frame):
+        nonlocal done, outstanding
+        with finished:
+            frames[index] = frame
+            done += 1
+            outstanding -= 1
+            finished.notify()
+
+    def failed(err):
+        nonlocal error, outstanding
+        with finished:
+            if error is None:
+                error = err
+            outstanding -= 1
+            finished.notify()
+
+    try:
+        pool = render_pool()
+        runtime = Stopwatch.Stopwatch()
+        for index, (frame, block) in enumerate(zip(list_of_frames, blocks)):
+            job = (frame, None if block is None else block.name, texture_cache)
+            with finished:
+                outstanding += 1
+            pool.apply_async(_render_job, (job,),
+                             callback=lambda frame, index=index: completed(index, frame),
+                             error_callback=failed)
+
+        with finished:
+            while done < len(list_of_frames) and error is None:
+                progressbar.printProgressBar(done, len(
+                    list_of_frames), prefix=' Rendering', suffix='  (' + str(runtime) + ')')
+                finished.wait(1)
+        if error is not None:
+            raise error
+        progressbar.printProgressBar(done, len(
+            list_of_frames), prefix=' Rendering', suffix='  (' + str(runtime) + ')')
+        print()
+
+        for frame, block in zip(frames, blocks):
+            if block is not None:
+                frame.texture = np.asarray(_SharedTexture(block, frame.texture_shape))
+    finally:
+        # The blocks are unlinked only after every job ended, even if one
+        # of them failed
+        with finished:
+            while outstanding:
+                finished.wait(1)
+        for block in blocks:
+            if block is not None:
+                block.unlink()  # The name is not needed any more
+    return frames
+
+
+def _shared_memory_fits(nbytes):
+    """Tells whether there is enough free shared memory for the given
+    number of bytes. Docker limits /dev/shm to 64 MB by default."""
+    try:
+        stat = os.statvfs('/dev/shm')
+    except (AttributeError, OSError):  # Windows or no /dev/shm
+        return True
+    return stat.f_bavail * stat.f_frsize > nbytes
+
+
+def _render_job(job):
+    """Renders a Frame in a worker process. If the name of a shared memory
+    block is given the texture is written into it and the Frame is
+    returned without its image data.
+
+    :param job: The Frame, the name of the block and the texture cache of
+        the parent process.
+    :type job: (Frame, str or None, TextureCache or None)
+
+    :returns: The rendered Frame.
     """
+    frame, block_name, cache = job
+    set_texture_cache(cache)
+    frame = Frame.ext_make(frame)
+    if block_name is None:
+        return frame
 
-    pool = Pool()
-    runtime = Stopwatch.Stopwatch()
+    if frame.texture.shape != frame.texture_shape:
+        raise ValueError(repr(frame) + ' made a texture with an unexpected shape')
 
-    results = pool.imap(Frame.ext_make, list_of_frames)
-    pool.close()
+    block = shared_memory.SharedMemory(name=block_name)
+    shared = np.ndarray(frame.texture_shape, dtype=np.uint8, buffer=block.buf)
+    shared[...] = frame.texture
+    del shared
+    block.close()
 
-    while results._index < len(list_of_frames):
-        progressbar.printProgressBar(results._index, len(
-            list_of_frames), prefix=' Rendering', suffix='  (' + str(runtime) + ')')
-        sleep(0.1)
-    progressbar.printProgressBar(results._index, len(
-        list_of_frames), prefix=' Rendering', suffix='  (' + str(runtime) + ')')
-    pool.join()
-    print()
-    return list(results)
+    frame.frame = None
+    frame.texture = None
+    return frame
+
+
+class _SharedTexture(object):
+    """Shows a shared memory block as an array for np.asarray. The block
+    stays open until the last array using it is garbage collected."""
+
+    def __init__(self, block, shape):
+        self.array = np.ndarray(shape, dtype=np.uint8, buffer=block.buf)
+        self.block = block  # Closed after the array is released
+
+    @property
+    def __array_interface__(self):
+        return self.array.__array_interface__
+
+
+def _random_pixels(high, shape, scale=1):
+    """Random integers from [0, high) multiplied by scale as uint8. They are
+    drawn a block of rows at a time, which gives the same pixels for a seed
+    as drawing all of them at once with np.random.randint.
+
+    :rtype: np.array of uint8
+    """
+    pixels = np.empty(shape, dtype=np.uint8)
+    for start in range(0, shape[0], BLOCK_ROWS):
+        rows = pixels[start:start+BLOCK_ROWS]
+        rows[...] = scale * np.random.randint(high, size=rows.shape)
+    return pixels
+
+
+def _tint(frame, level):
+    """The greyscale frame multiplied by level and rounded. uint8 frames
+    are tinted with a lookup table.
+
+    :param frame: The greyscale image.
+    :type frame: np.array with ndim=2
+
+    :param level: The brightness of the color channel between 0 and 1.
+    :type level: float
+    """
+    if frame.dtype == np.uint8:
+        if level == 1:
+            return frame
+        table = np.round(level * np.arange(256)).astype(np.uint8)
+        return table[frame]
+    tinted = np.multiply(frame, level, dtype=np.float64)
+    return np.round(tinted, out=tinted)
+
+
+def tint(texture, rgb):
+    """Applies a tint to a texture like the colour modulation does when a
+    luminance texture is drawn.
+
+    :param texture: A luminance or RGB texture.
+    :type texture: np.array of uint8 with ndim=2 or 3
+
+    :param rgb: The Red, Green and Blue levels of the tint.
+    :type rgb: (float, float, float)
+
+    :returns: An RGB texture. RGB textures without tint are returned as they are.
+    """
+    if texture.ndim == 3 and tuple(rgb) == (1, 1, 1):
+        return texture
+
+    tinted = np.empty(texture.shape[:2] + (3,), dtype=np.uint8)
+    for channel, level in enumerate(rgb):
+        layer = texture if texture.ndim == 2 else texture[..., channel]
+        tinted[..., channel] = _tint(layer, level)
+    return tinted
+
+
+def _same_tint(list_of_frames):
+    """True if all the Frames have luminance textures with the same tint,
+    so they can be drawn together with one colour."""
+    return len({(frame.texture.ndim, tuple(frame.rgb))
+                for frame in list_of_frames}) == 1 and \
+        list_of_frames[0].texture.ndim == 2
 
 
 def transition(left, right, transition_width):
@@ -88,9 +351,23 @@ def frame_transitions(list_of_frames, transition_width):
 
     frames = list_of_frames
     if transition_width > 0:
+        for frame in frames:
+            if not frame.texture.flags.writeable:
+                # Shared by identical Frames, blended on a copy
+                frame.texture = frame.texture.copy()
+
+        if not _same_tint(frames):
+            # Luminance textures can't be blended with other colours
+            for frame in frames:
+                frame.bake_tint()
 
         for i, _ in enumerate(frames):
             j = (i+1) % (len(frames))
+            if frames[i].texture.ndim == 2:
+                frames[i].texture, frames[j].texture = transition(
+                    frames[i].texture, frames[j].texture, transition_width)
+                continue
+
             left_r, right_r = transition(
                 frames[i].texture[..., 0], frames[j].texture[..., 0], transition_width)
             left_g, right_g = transition(
@@ -110,21 +387,54 @@ def frame_transitions(list_of_frames, transition_width):
     return list(frames)
 
 
-def combine(list_of_frames):
-    """Makes a Frame that is a combination of a list of Frames.
+def combine(list_of_frames, view=False, width=None):
+    """Makes a Frame that is a combination of a list of Frames. If the
+    Frames have different tints, the combined texture is RGB with the
+    tints applied.
 
     :param list_of_frames: A list of Frame objects without transitions.
     :type list_of_frames: [Frame]
 
+    :param view: If True the textures of the given Frames are replaced with
+        slices of the combined texture, so their pixels are only stored once.
+        These slices are not contiguous. False by default.
+    :type view: bool
+
+    :param width: Only the first this many columns are combined, the rest of
+        the Frames are not used. Set to None to combine everything. None by
+        default.
+    :type width: int or None
+
     :returns: Frame
     """
 
-    combined = list_of_frames[0].texture
-    for fid in range(len(list_of_frames) - 1):
-        combined = np.concatenate(
-            (combined, list_of_frames[fid + 1].texture), axis=1)
-
-    combined_frame = Frame(combined.shape[1], combined.shape[0])
+    luminance = _same_tint(list_of_frames)
+    rgb = list_of_frames[0].rgb if luminance else (1, 1, 1)
+    channels = () if luminance else (3,)
+
+    height = list_of_frames[0].texture.shape[0]
+    widths = [frame.texture.shape[1] for frame in list_of_frames]
+    total_width = sum(widths)
+    if width is not None:
+        total_width = min(width, total_width)
+    combined = np.empty((height, total_width) + channels, dtype=np.uint8)
+
+    start = 0
+    for frame, frame_width in zip(list_of_frames, widths):
+        if start >= total_width:
+            break
+        texture = frame.texture if luminance else tint(frame.texture, frame.rgb)
+        if start + frame_width > total_width:
+            # Only the beginning of the last Frame is needed
+            combined[:, start:] = texture[:, :total_width-start]
+            break
+        combined[:, start:start+frame_width] = texture
+        if view:
+            frame.texture = combined[:, start:start+frame_width]
+            frame.rgb = rgb
+        start += frame_width
+
+    combined_frame = Frame(combined.shape[1], combined.shape[0], rgb)
     combined_frame.texture = combined
     combined_frame.made = True
     return combined_frame
@@ -139,12 +449,14 @@ class Frame(object):
     :param height: The height of the Frame in pixels.
     :type height: int
 
-    :param rgb: The Red, Green and Blue levels of the Frame.
+    :param rgb: The Red, Green and Blue levels of the Frame. They tint
+        the luminance texture when it is drawn.
     :type rgb: (float, float, float)
     """
 
     frame_id = 0
     display_name = "Frame"
+    texture_format = 'L'  # The PIL mode of the texture, 'L' or 'RGB'
 
     def __init__(self, width, height, rgb=(1, 1, 1)):
         Frame.frame_id += 1
@@ -169,13 +481,46 @@ class Frame(object):
     def __hash__(self):
         """The hash of the Frame."""
         import binascii
+        frame_hash = binascii.crc32(self.hash_string.encode('utf-8')) & 0xFFFFFFFF
+        return int(frame_hash)
+
+    @property
+    def hash_string(self):
+        """The properties that define what the Frame looks like as a string."""
         hash_keys = ['width', 'height', 'seed',
                      'side_length', 'wavelength', 'angle']
         hash_comps = [self.__dict__.get(key) for key in hash_keys]
         hash_comps = [comp for comp in hash_comps if comp is not None]
-        hash_string = str(type(self)) + str(hash_comps)
-        frame_hash = binascii.crc32(hash_string.encode('utf-8')) & 0xFFFFFFFF
-        return int(frame_hash)
+        return str(type(self)) + str(hash_comps)
+
+    @property
+    def texture_shape(self):
+        """The shape of the Frame's texture."""
+        if self.texture_format == 'RGB':
+            return (self.height, self.width, 3)
+        return (self.height, self.width)
+
+    @property
+    def texture_nbytes(self):
+        """The size of the Frame's texture in bytes."""
+        return int(np.prod(self.texture_shape))
+
+    @property
+    def cacheable(self):
+        """True if the Frame looks the same every time it is made."""
+        return True
+
+    @property
+    def cache_key(self):
+        """The key of the Frame's texture in the texture cache. Changes with
+        the Frame's hash, the texture format and the version of the package.
+        None if the Frame can't be cached."""
+        if not self.cacheable:
+            return None
+        key_string = self.hash_string + self.texture_format + \
+            GramophoneTools.__version__
+        digest = hashlib.sha1(key_string.encode('utf-8')).hexdigest()
+        return type(self).__name__ + '_' + digest
 
     @staticmethod
     def ext_make(frame):
@@ -183,7 +528,17 @@ class Frame(object):
         the rendered Frame.
         """
 
+        key = None if texture_cache is None else frame.cache_key
+        if key is not None:
+            texture = texture_cache.load(key)
+            if texture is not None:
+                frame.texture = texture
+                frame.made = True
+                return frame
+
         frame.make()
+        if key is not None:
+            texture_cache.store(key, frame.texture)
         return frame
 
     def make(self):
@@ -196,7 +551,7 @@ class Frame(object):
         """Makes a PIL Image of the Frame."""
         if not self.made:
             self.make()
-        return Image.fromarray(np.flip(self.texture, 0))
+        return Image.fromarray(np.flip(tint(self.texture, self.rgb), 0))
 
     def show_img(self):
         """Displays the bitmap image of the Frame."""
@@ -212,20 +567,31 @@ class Frame(object):
         self.make_img().convert('RGB').save(filename)
 
     def make_texture(self):
-        """Makes the Frame's texture field that stores RGB data to be used as an OpenGL texture ."""
+        """Makes the Frame's texture field that stores luminance data to be used as an OpenGL texture .
+        The rgb of the Frame is applied when the texture is drawn. The
+        greyscale frame is released once the texture is made."""
         if self.texture is None:
             # Flip Frame up and down to fit with opengl indexing
             flipped_frame = np.flip(
                 self.frame, 0)
-            frame_r = np.round(self.rgb[0] * flipped_frame)
-            frame_g = np.round(self.rgb[1] * flipped_frame)
-            frame_b = np.round(self.rgb[2] * flipped_frame)
-            data = np.dstack((frame_r, frame_g, frame_b))
-            self.texture = data.astype(np.uint8)
+            texture = np.empty(flipped_frame.shape, dtype=np.uint8)
+            texture[...] = _tint(flipped_frame, 1)
+            self.texture = texture
+        self.frame = None
+
+    def bake_tint(self):
+        """Turns a luminance texture into an RGB texture with the rgb of the
+        Frame applied, so it can be drawn next to differently tinted ones."""
+        if self.texture is not None and self.texture.ndim == 2:
+            self.texture = tint(self.texture, self.rgb)
+            self.rgb = (1, 1, 1)
 
     def mirror(self):
         """Horizontally mirrors the Frame"""
-        self.frame = np.flip(self.frame, 1)
+        if self.frame is not None:
+            self.frame = np.flip(self.frame, 1)
+        if self.texture is not None:
+            self.texture = np.flip(self.texture, 1)
 
 
 class RandomFrame(Frame):
@@ -238,6 +604,10 @@ class RandomFrame(Frame):
         super().__init__(width, height)
         self.seed = seed
 
+    @property
+    def cacheable(self):
+        return self.seed is not None
+
 
 class BinaryNoise(RandomFrame):
     """Creates a Frame with noise, that only has black and white pixels"""
@@ -249,7 +619,7 @@ class BinaryNoise(RandomFrame):
     def make(self):
         if self.seed is not None:
             np.random.seed(self.seed)
-        self.frame = 255 * np.random.randint(2, size=(self.height, self.width))
+        self.frame = _random_pixels(2, (self.height, self.width), 255)
         super().make()
 
 
@@ -260,8 +630,12 @@ class GreyNoise(RandomFrame):
     def __str__(self):
         return super().__str__() + " - Type: Greyscale noise"
 
+    @property
+    def cacheable(self):
+        return False  # The seed is not used
+
     def make(self):
-        self.frame = np.random.randint(256, size=(self.height, self.width))
+        self.frame = _random_pixels(256, (self.height, self.width))
         super().make()
 
 
@@ -282,18 +656,11 @@ class Checkerboard(Frame):
         return super().__str__() + " - Type: Checkerboard - Side length: " + str(self.side_length)
 
     def make(self):
-        self.frame = np.zeros((self.height, self.width))
-        horizontal = math.ceil(self.width / (2 * self.side_length))
-        vertical = math.ceil(self.height / (2 * self.side_length))
-
-        black = np.zeros((self.side_length, self.side_length))
-        white = np.ones((self.side_length, self.side_length)) * 255
-
-        even_rows = np.concatenate(horizontal * [white, black], 1)
-        odd_rows = np.concatenate(horizontal * [black, white], 1)
-
-        block = np.concatenate(vertical * [even_rows, odd_rows], 0)
-        self.frame = block[0:self.height, 0:self.width]
+        # The top left square is white
+        rows = (np.arange(self.height) // self.side_length % 2).astype(np.uint8)
+        cols = (np.arange(self.width) // self.side_length % 2).astype(np.uint8)
+        black = rows[:, np.newaxis] ^ cols[np.newaxis, :]
+        self.frame = (1 - black) * np.uint8(255)
         super().make()
 
 
@@ -357,27 +724,22 @@ class WaveFrame(Frame):
         return math.ceil(127.5 + 127.5 * -1 * math.cos(val))
 
     def make(self):
-        self.frame = np.zeros((self.height, self.width))
-
-        def norm(x, y):
-            """Distance from origin along a line with angle."""
-            return abs(math.sin(self.angle) * y + math.cos(self.angle) * x)
-
-        for [y, x], _ in np.ndenumerate(self.frame):
-
-            val = norm(x, y)
+        self.frame = np.empty((self.height, self.width), dtype=np.uint8)
+        x = np.arange(self.width)[np.newaxis, :]
+        for start in range(0, self.height, BLOCK_ROWS):
+            y = np.arange(start, min(start+BLOCK_ROWS, self.height))[:, np.newaxis]
 
+            # Distance from origin along a line with angle
+            val = np.abs(math.sin(self.angle) * y + math.cos(self.angle) * x)
             val %= self.wavelength
-            if val % 1:
-                below = math.floor(val)
-                above = math.ceil(val)
-                if above == self.wavelength:
-                    above = 0
-                val = (1 - (val % 1)) * \
-                    self.wave_temp[below] + (val % 1) * self.wave_temp[above]
-            else:
-                val = self.wave_temp[int(val)]
-            self.frame[y, x] = val
+
+            # Interpolate between the neighbouring values of the wave
+            below = np.floor(val).astype(np.intp)
+            above = below + 1
+            above[above == self.wavelength] = 0
+            frac = val % 1
+            self.frame[start:start+BLOCK_ROWS] = np.round(
+                (1 - frac) * self.wave_temp[below] + frac * self.wave_temp[above])
 
         super().make()
 
@@ -417,6 +779,7 @@ class ImageFile(Frame):
     :type filename: string
     """
     display_name = "Image file"
+    texture_format = 'RGB'
 
     def __init__(self, height, filename):
         self.filename = filename
@@ -434,6 +797,10 @@ class ImageFile(Frame):
     def __str__(self):
         return super().__str__() + " - Type: Image file - Filename: " + self.filename
 
+    @property
+    def cacheable(self):
+        return False  # Loaded from the file when created
+
     def make(self):
         self.make_texture()
         self.made = True
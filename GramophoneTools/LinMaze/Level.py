@@ -6,7 +6,7 @@ import os
 import numpy as np
 
 from GramophoneTools.LinMaze import LinMaze, Frame, Event, Rule
-from GramophoneTools.LinMaze.Zone import Zone
+from GramophoneTools.LinMaze.Zone import Zone, ZoneIndex
 from GramophoneTools.LinMaze.Tools import Stopwatch, progressbar
 from GramophoneTools.LinMaze.Tools.filehandler import select_file
 
@@ -45,6 +45,10 @@ class _Level(object):
         self.offset = 0
 
         self.rendered = False
+        self.revision = 0  # Changes when the frames change
+        self._combined_frame = None
+        self._dummy_frame = None
+        self._zone_index = None
 
         self.frames: List[Frame] = []
         self.events: Dict[Event] = {}
@@ -70,11 +74,17 @@ class _Level(object):
     @property
     def dummy_frame(self):
         """A frame that looks like the begining of the level."""
-        dummy_frame = Frame.Frame(self.screen_width, self.screen_height)
-        dummy_frame.texture = self.combined_frame.texture[:, :self.screen_width].astype(
-            np.uint8)
-        dummy_frame.made = True
-        return dummy_frame
+        if self._dummy_frame is None:
+            if not self.rendered:
+                self.render()
+
+            leading = Frame.combine(self.frames, width=self.screen_width)
+            dummy_frame = Frame.Frame(self.screen_width, self.screen_height,
+                                      leading.rgb)
+            dummy_frame.texture = leading.texture
+            dummy_frame.made = True
+            self._dummy_frame = dummy_frame
+        return self._dummy_frame
 
     @property
     def combined_frame(self):
@@ -82,7 +92,24 @@ class _Level(object):
         if not self.rendered:
             self.render()
 
-        return Frame.combine(self.frames)
+        if self._combined_frame is None:
+            self._combined_frame = Frame.combine(self.frames, view=True)
+        return self._combined_frame
+
+    @property
+    def zone_index(self):
+        """The zones of the level, sorted for finding the zone of a position."""
+        if self._zone_index is None:
+            self._zone_index = ZoneIndex(self.zones)
+        return self._zone_index
+
+    def _frames_changed(self):
+        """Forgets the images and the zone index made from the frames of
+        the level."""
+        self.revision += 1
+        self._combined_frame = None
+        self._dummy_frame = None
+        self._zone_index = None
 
     @property
     def image(self):
@@ -118,6 +145,8 @@ class _Level(object):
             raise ValueError(
                 'Error: \'{}\' is not a valid frame_type'.format(frame_type))
         frame = frame_maker()
+        if frame.texture_format == 'L':
+            frame.rgb = self.rgb  # Applied when the frame is drawn
 
         # New zone starts at the end of the last one
         offset = 0
@@ -127,6 +156,7 @@ class _Level(object):
 
         self.frames.append(frame)
         self.zones.append(zone)
+        self._frames_changed()
 
         print("\nAdded block to " + self.name + ":")
         print(str(frame))
@@ -220,16 +250,26 @@ class _Level(object):
 
     def reset_rules(self):
         for rule in self.rules:
-            if hasattr(rule, 'delay_timer'):
-                rule.delay_timer.reset()
+            if isinstance(rule, Rule.DelayedRule):
+                rule.reset()
 
     def render(self):
         """Renders all the frames of the level, making it ready to be played."""
         if not self.rendered:
             print('\n'+self.name,  '>>\n')
-            self.frames = Frame.multi_make(self.frames)
+            self._finish_render(Frame.multi_make(self.frames))
+
+    def _finish_render(self, made_frames):
+        """Makes the transitions between the already made frames and loads
+        their textures.
+
+        :param made_frames: The frames of the level returned by Frame.multi_make.
+        :type made_frames: [Frame]
+        """
+        if not self.rendered:
             self.frames = Frame.frame_transitions(
-                self.frames, self.transition_width)
+                made_frames, self.transition_width)
+            self._frames_changed()
 
             loadtime = Stopwatch.Stopwatch()
             for count, frame in enumerate(self.frames):
@@ -282,7 +322,7 @@ class _Level(object):
 
     @property
     def length(self):
-        return sum(zone.length for zone in self.zones)
+        return self.zone_index.length
 
     def get_zone_by_name(self, zone_name: str) -> Union[Zone, None]:
         try:
@@ -314,6 +354,9 @@ class LevelCollection:
 
         self.active_level: Union[_Level, None] = None
         self.frames: List[Frame] = []
+        self._combined_frame = None
+        self._dummy_frame = None
+        self._images_of = None  # The level revisions the images were made of
 
         self._extra_args = args
         self._extra_kwargs = kwargs
@@ -338,18 +381,34 @@ class LevelCollection:
     def rendered(self):
         return all(lvl.rendered for lvl in self.level_list)
 
+    def _check_images(self):
+        """Forgets the combined images if any of the levels changed."""
+        revisions = [(id(lvl), lvl.revision) for lvl in self.level_list]
+        if revisions != self._images_of:
+            self._combined_frame = None
+            self._dummy_frame = None
+            self._images_of = revisions
+
     @property
     def dummy_frame(self):
-        dummy_frame = Frame.Frame(self.screen_width, self.screen_height)
-        dummy_frame.texture = self.combined_frame.texture[:, :self.screen_width].astype(
-            np.uint8)
-        dummy_frame.made = True
-        return dummy_frame
+        self.render()
+        self._check_images()
+        if self._dummy_frame is None:
+            leading = Frame.combine(self.frames, width=self.screen_width)
+            dummy_frame = Frame.Frame(self.screen_width, self.screen_height,
+                                      leading.rgb)
+            dummy_frame.texture = leading.texture
+            dummy_frame.made = True
+            self._dummy_frame = dummy_frame
+        return self._dummy_frame
 
     @property
     def combined_frame(self):
         self.render()
-        return Frame.combine(self.frames)
+        self._check_images()
+        if self._combined_frame is None:
+            self._combined_frame = Frame.combine(self.frames)
+        return self._combined_frame
 
     @property
     def image(self):
@@ -359,9 +418,20 @@ class LevelCollection:
         self.image.show()
 
     def render(self):
+        # The frames of all levels are rendered at the same time, so the
+        # workers are kept busy until everything is done
+        unrendered = [lvl for lvl in self.level_list if not lvl.rendered]
+        if unrendered:
+            print('\n'+', '.join(lvl.name for lvl in unrendered), '>>\n')
+            made_frames = Frame.multi_make(
+                [frame for lvl in unrendered for frame in lvl.frames])
+            for lvl in unrendered:
+                frame_count = len(lvl.frames)
+                lvl._finish_render(made_frames[:frame_count])
+                made_frames = made_frames[frame_count:]
+
         self.frames = []
         for lvl in self.level_list:
-            lvl.render()
             self.frames += lvl.frames  # list append
 
     def reset_rules(self):
@@ -1,6 +1,8 @@
 import os
+import queue
 import random
 import ctypes
+import threading
 import time
 
 import h5py
@@ -9,7 +11,14 @@ import pyglet
 from pyglet.gl import *
 
 from GramophoneTools.LinMaze import Rule
+from GramophoneTools.LinMaze.EventLog import EVENT_DTYPE, EventLog, LogEntry
+from GramophoneTools.LinMaze.Renderer import Renderer, atlas_units
+from GramophoneTools.LinMaze.Residency import (TextureResidency, TextureUploader,
+                                               max_texture_size, split_unit)
+from GramophoneTools.LinMaze.Simulation import TIME_UNIT, Simulation
+from GramophoneTools.LinMaze.Tools.Scheduler import Scheduler
 from GramophoneTools.LinMaze.Tools.Stopwatch import Stopwatch
+from GramophoneTools.LinMaze.Tools.TextureRegistry import TextureRegistry
 from GramophoneTools.LinMaze.Tools.filehandler import select_file
 from GramophoneTools import Comms
 import GramophoneTools
@@ -68,50 +77,14 @@ class VRWindow(pyglet.window.Window):
         glMatrixMode(GL_MODELVIEW)
         glDisable(GL_DEPTH_TEST)
         glClearColor(0.0, 0.0, 0.0, 0.0)
-        glEnable(GL_TEXTURE_2D)
-        glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
-        glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glEnable(GL_TEXTURE_2D)  # Filters are set by the TextureUploader
 
     def on_key_press(self, symbol, modifiers):
-        if symbol == pyglet.window.key.SPACE:
-            if self.session.paused:
-                self.session.unpause()
-            else:
-                self.session.pause()
-
         if symbol == pyglet.window.key.ESCAPE:
             pyglet.app.exit()
-
-        for lvl in self.session.collection:
-            for rule in lvl.rules:
-                # Check keypress rules
-                if type(rule) is Rule.KeyPressRule:
-                    rule.check(symbol)
-
-        if modifiers & pyglet.window.key.MOD_CTRL:
-            if symbol == pyglet.window.key._1:
-                target = int(not self.session.last_read['DO-1'])
-                self.session.gramophone.write_output(1, target)
-
-            if symbol == pyglet.window.key._2:
-                target = int(not self.session.last_read['DO-2'])
-                self.session.gramophone.write_output(2, target)
-
-            if symbol == pyglet.window.key._3:
-                target = int(not self.session.last_read['DO-3'])
-                self.session.gramophone.write_output(3, target)
-
-            if symbol == pyglet.window.key._4:
-                target = int(not self.session.last_read['DO-4'])
-                self.session.gramophone.write_output(4, target)
-
-            if symbol == pyglet.window.key.LEFT:
-                self.session.manual_vel += 5
-
-            if symbol == pyglet.window.key.RIGHT:
-                self.session.manual_vel -= 5
+        else:
+            # Handled by the simulation at its next tick
+            self.session.simulation.keys.put((symbol, modifiers))
 
     def on_close(self):
         pyglet.app.exit()
@@ -122,51 +95,7 @@ class VRWindow(pyglet.window.Window):
         # Clean canvas
         glClear(GL_COLOR_BUFFER_BIT)
 
-        # Dispay all vr units
-        for vru in self.session.vr_units:
-            sy = self.session.collection.screen_height
-            sx = vru["length"]
-
-            glLoadIdentity()
-            glColor3f(1.0, 1.0, 1.0)
-            glBindTexture(GL_TEXTURE_2D, vru["texture_id"])
-
-            if self.mirrored:
-                glTranslatef((-1) * vru["position"] +
-                             self.session.collection.screen_width -
-                             vru["length"], 0, 0)
-
-                glBegin(GL_QUADS)
-
-                glTexCoord2f(0, 0)
-                glVertex2i(sx, 0)
-
-                glTexCoord2f(1, 0)
-                glVertex2i(0, 0)
-
-                glTexCoord2f(1, 1)
-                glVertex2i(0, sy)
-
-                glTexCoord2f(0, 1)
-                glVertex2i(sx, sy)
-            else:
-                glTranslatef(vru["position"], 0, 0)
-
-                glBegin(GL_QUADS)
-
-                glTexCoord2f(1, 0)
-                glVertex2i(sx, 0)
-
-                glTexCoord2f(0, 0)
-                glVertex2i(0, 0)
-
-                glTexCoord2f(0, 1)
-                glVertex2i(0, sy)
-
-                glTexCoord2f(1, 1)
-                glVertex2i(sx, sy)
-
-            glEnd()
+        self.session.renderer.draw(self.mirrored)
 
         if self.session.offset_arrow:
             glLoadIdentity()
@@ -183,7 +112,10 @@ class VRWindow(pyglet.window.Window):
 
 
 class VRLog(object):
-    """A logger for LinMaze Sessions.
+    """A logger for LinMaze Sessions. The entries are collected by the
+    thread that steps the Session and handed to a background thread in
+    batches of 600, which writes them into the file (see start), so the
+    Session doesn't wait for the disk.
 
     :param session: The session that should be logged.
     :type session: Session
@@ -238,6 +170,9 @@ class VRLog(object):
         self.vrl.create_dataset("output_4", (0,),
                                 maxshape=(None,), dtype=np.int8)
 
+        self.vrl.create_dataset("events", (0,),
+                                maxshape=(None,), dtype=EVENT_DTYPE)
+
         zone_count = len(session.collection.all_zones())
         self.vrl.create_dataset("zone", (0, zone_count), maxshape=(
             None, zone_count), dtype=np.int8)
@@ -248,7 +183,12 @@ class VRLog(object):
                 maxshape=(None,),
                 dtype=np.int8)
 
-        # Make log lists
+        self.batches = queue.SimpleQueue()
+        self.thread = None
+        self.new_records()
+
+    def new_records(self):
+        """Makes empty log lists for the next entries."""
         self.time_record = []
         self.g_time_record = []
         self.vel_record = []
@@ -263,9 +203,67 @@ class VRLog(object):
         self.output_record_3 = []
         self.output_record_4 = []
 
-        self.zone_id_records = np.empty((0, zone_count), dtype=bool)
+        self.zone_id_records = []
         self.zone_type_records = {zt: [] for zt in self.zone_types}
 
+    def records(self):
+        """The log lists with the names of the fields they are written into.
+
+        :rtype: list of (list, str)
+        """
+        records = [(self.time_record, 'time'),
+                   (self.g_time_record, 'g_time'),
+                   (self.vel_record, 'velocity'),
+                   (self.pos_record, 'position'),
+                   (self.teleport_record, 'teleport'),
+                   (self.pause_record, 'paused'),
+                   (self.input_record_1, 'input_1'),
+                   (self.input_record_2, 'input_2'),
+                   (self.output_record_1, 'output_1'),
+                   (self.output_record_2, 'output_2'),
+                   (self.output_record_3, 'output_3'),
+                   (self.output_record_4, 'output_4'),
+                   (self.zone_id_records, 'zone')]
+        for zone_type in self.zone_types:
+            records.append((self.zone_type_records[zone_type],
+                            "zone_types/" + zone_type))
+        return records
+
+    def start(self):
+        """Starts writing the entries in the background."""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Writes the entries made so far and stops."""
+        self.hand_over()
+        if self.thread is not None:
+            self.batches.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        """Writes the batches of entries until stopped. Runs in the
+        background thread."""
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                return
+            for record, field_name in batch:
+                self.flush(record, field_name)
+
+    def hand_over(self):
+        """Gives the entries made so far to the background thread and
+        starts new log lists. Writes them right away if the background
+        thread is not running."""
+        batch = self.records()
+        self.new_records()
+        if self.thread is None:
+            for record, field_name in batch:
+                self.flush(record, field_name)
+        else:
+            self.batches.put(batch)
+
     def make_entry(self, vel, g_time, in_1, in_2, out_1, out_2, out_3, out_4):
         """Makes an entry in all the session logs.
 
@@ -292,8 +290,7 @@ class VRLog(object):
 
         zone_row = [int(self.session.current_zone.zone_id == zone.zone_id)
                     for zone in self.session.collection.active_level.zones]
-        self.zone_id_records = np.append(
-            self.zone_id_records, [zone_row], axis=0)
+        self.zone_id_records.append(zone_row)
 
         self.teleport_record.append(int(self.session.teleported))
         self.session.teleported = False
@@ -308,50 +305,30 @@ class VRLog(object):
         self.pause_record.append(int(self.session.paused))
 
         if len(self.time_record) >= 600:
-            self.flush_all()
+            self.hand_over()
 
     def flush_all(self):
         """Writes all temporary data to file."""
-
-        self.flush(self.time_record, 'time')
-        self.flush(self.g_time_record, 'g_time')
-        self.flush(self.vel_record, 'velocity')
-        self.flush(self.pos_record, 'position')
-        self.flush(self.teleport_record, 'teleport')
-        self.flush(self.pause_record, 'paused')
-        self.flush(self.input_record_1, 'input_1')
-        self.flush(self.input_record_2, 'input_2')
-        self.flush(self.output_record_1, 'output_1')
-        self.flush(self.output_record_2, 'output_2')
-        self.flush(self.output_record_3, 'output_3')
-        self.flush(self.output_record_4, 'output_4')
-
-        for zone_type in self.zone_types:
-            self.flush(
-                self.zone_type_records[zone_type], "zone_types/" + zone_type)
-
-        self.flush(self.zone_id_records, 'zone')
+        for record, field_name in self.records():
+            self.flush(record, field_name)
 
     def flush(self, record, field_name):
         """Writes the record list into the given field and clears it.
 
         :param record: The record that should be written to file.
-        :type record: list or np.ndarray
+        :type record: list
 
         :param field_name: The name of the field in the HDF5 file this record should 
             be written into.
         :type field_name: str
         """
 
-        if type(record) is np.ndarray:
-            new_count = record.shape[0] - self.vrl[field_name].shape[0]
-            self.vrl[field_name].resize(record.shape[0], axis=0)
-            self.vrl[field_name][-new_count:] = record[-new_count:]
-        else:
-            self.vrl[field_name].resize(
-                self.vrl[field_name].shape[0] + len(record), axis=0)
-            self.vrl[field_name][-len(record):] = record
-            del record[:]
+        if not record:
+            return
+        self.vrl[field_name].resize(
+            self.vrl[field_name].shape[0] + len(record), axis=0)
+        self.vrl[field_name][-len(record):] = record
+        del record[:]
 
     def close(self):
         """Record the time and close the log."""
@@ -397,11 +374,38 @@ class Session(object):
 
     :param skip_save: Should the saving of a log be skipped for this Session? False by default.
     :type skip_save: bool
+
+    :param tiled: Should every level be drawn from its combined image in a
+        few large textures, instead of a texture for every block and a dummy
+        frame for looping? Saves the memory of the dummy frames and most of
+        the texture binds. False by default.
+    :type tiled: bool
+
+    :param vram_budget: How many megabytes of textures can be kept in video
+        memory. If it is set, textures are uploaded while the Session runs,
+        when they get close to the screen, and the least recently used ones
+        are freed when the budget is exceeded. Set to None to upload every
+        texture before the Session starts. None by default.
+    :type vram_budget: float or None
+
+    :param sampling_rate: How many times the Gramophone is read in a second.
+        It is read in a background thread, so this doesn't depend on the
+        frame rate. 200 by default.
+    :type sampling_rate: float
+
+    :param tick_rate: How many times in a second (of the Gramophone's clock)
+        the position, the zone, the rules and the log are updated. The
+        velocity is measured in pixels per tick. The picture is moved
+        smoothly between ticks, at the refresh rate of the monitors.
+        60 by default.
+    :type tick_rate: float
     """
 
     def __init__(self, collection, vel_ratio=1, runtime_limit=None,
                  left_monitor=1, right_monitor=None, gramophone_serial=None,
-                 fullscreen=True, offset_arrow=False, skip_save=False):
+                 fullscreen=True, offset_arrow=False, skip_save=False,
+                 tiled=False, vram_budget=None, sampling_rate=200,
+                 tick_rate=60):
 
         self.collection = collection
         self.vel_ratio = vel_ratio
@@ -411,10 +415,19 @@ class Session(object):
         self.gramophone_serial = gramophone_serial
         self.offset_arrow = offset_arrow
         self.skip_save = skip_save
+        self.tiled = tiled
+        self.vram_budget = vram_budget
+        self.sampling_rate = sampling_rate
+        self.simulation = Simulation(self.step, self.press_key, tick_rate)
         self.manual_vel = 0  # For controlling movement with keyboard
         self.virtual_relative_position = 1
 
+        # How long each part of the startup takes in seconds
+        self.startup_times = {}
+        startup = Stopwatch()
+
         grams = Comms.find_devices()
+        self.startup_times['device discovery'] = startup.value()
         if grams:
             if self.gramophone_serial is None:
                 print('\nNo Gramophone specified. Using the first one.')
@@ -425,25 +438,34 @@ class Session(object):
             raise(LinMazeError('No gramophones connected.'))
 
         self.vr_units = []
+        self.camera = 0  # Where the first VR unit is on the screen
         self.runtime = Stopwatch()
         self.position = self.collection.zone_offset - 1
         self.current_zone = self.collection.active_level.zones[0]
         self.paused = False
         self.teleported = False
         self.last_position = 0
+        self.last_read = None
 
         # Render the level if it wasn't pre rendered
+        startup.reset()
         if not collection.rendered:
             collection.render()
+        self.startup_times['rendering'] = startup.value()
 
         self.calculate_level_offsets()
 
-        # Set session for all events
+        # Set session for all events, name the events and number the rules
+        # for the event log
         for lvl in self.collection:
             for key in lvl.events:
                 lvl.events[key].set_session(self)
+                lvl.events[key].name = key
+            for rule_id, rule in enumerate(lvl.rules):
+                rule.rule_id = rule_id
 
         # Make the window
+        startup.reset()
         if left_monitor is not None:
             left_window = VRWindow(
                 self, self.left_monitor, mirrored=False, fullscreen=fullscreen)
@@ -455,6 +477,7 @@ class Session(object):
                 self, self.right_monitor, mirrored=True, fullscreen=fullscreen)
         else:
             right_window = None
+        self.startup_times['windows'] = startup.value()
 
         def main_loop(_):
             """Commands executed at each frame refresh.
@@ -465,84 +488,55 @@ class Session(object):
             """
             # print('FPS:', 1/dt)s
 
-            params = {}
-            try:
-                for key, val in self.gramophone.read_linmaze_params().items():
-                    params[self.gramophone.parameters[key].name] = val
-
-                self.last_read = params
-
-            except Comms.GramophoneError as err:
-                print("Communication ERROR:", err)
-                print("Using the previously read values.")
-                params = self.last_read
-
-            velocity = round(
-                self.vel_ratio*(params['ENCPOS'] - self.last_position)/14400)
-            velocity += self.manual_vel
-            self.last_position = params['ENCPOS']
-
-            if self.paused:
-                self.movement(0)
-            else:
-                self.movement(velocity)
-
-            self.check_zone()
-
-            if not self.skip_save:
-                self.log.make_entry(velocity, params['TIME'],
-                                    params['DI-1'], params['DI-2'],
-                                    params['DO-1'],  params['DO-2'],
-                                    params['DO-3'],  params['DO-4'])
+            # The simulation runs in the acquisition thread, the session
+            # ends if it stopped with an error
+            if self.acquisition.error is not None:
+                pyglet.app.exit()
+                return
 
-            self.check_rules(velocity, params['DI-1'], params['DI-2'])
+            # The picture is moved between the last two ticks
+            camera = self.simulation.camera(self.acquisition.latest)
+            if camera is not None:
+                self.camera = camera
 
             if self.runtime_limit is not None and\
                     self.runtime.value() >= self.runtime_limit * 60:
                 pyglet.app.exit()
 
-        # Make an OpenGL texture from every frame's texture
-        texture_ids = []
-        textures = []
-        for level in self.collection:
-            textures += [frame.texture for frame in level.frames]
-            textures.append(level.dummy_frame.texture)
-        for tex in textures:
-            # from PIL import Image
-            # Image.fromarray(tex).show()
-            sy = tex.shape[0]
-            sx = tex.shape[1]
-            # print('X', tex.shape[1], 'Y', tex.shape[0], 'C', tex.shape[2])
-
-            tid = GLuint(0)
-            glGenTextures(1, ctypes.byref(tid))
-
-            glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
-            glBindTexture(GL_TEXTURE_2D, tid)
-            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, sx, sy,
-                         0, GL_RGB, GL_UNSIGNED_BYTE, tex.ctypes.data)
-            glGenerateMipmap(GL_TEXTURE_2D)
-            texture_ids.append(tid)
+        # Make the VR units and their OpenGL textures, identical
+        # textures are only made once
+        startup.reset()
+        self.uploader = TextureUploader()
+        if self.vram_budget is None:
+            self.residency = None
+            registry = TextureRegistry(self.uploader.upload)
+        else:
+            self.residency = TextureResidency(int(self.vram_budget * 1024**2),
+                                              uploader=self.uploader)
+            registry = TextureRegistry(self.residency.add)
+        # Tiles ahead are uploaded up to a screen width away from the screen
+        self.prefetch_distance = self.collection.screen_width
+        if self.tiled:
+            self.make_atlas_units(registry.register)
+        else:
+            self.make_frame_units(registry.register)
+        print('\nMade', len(registry), 'textures for', len(self.vr_units),
+              'VR units (' + str(round(registry.unique_bytes / 1024**2, 1)),
+              'MB, identical textures saved',
+              str(round(registry.saved_bytes / 1024**2, 1)) + ' MB)')
+        if self.residency is not None:
+            print('Textures are uploaded when they are needed, keeping at most',
+                  self.vram_budget, 'MB in video memory')
+        else:
+            self.uploader.report()
+
+        self.index_vr_units()
+        self.renderer = Renderer(self)
+        self.startup_times['textures'] = startup.value()
+        print('Startup took', ', '.join(
+            name + ' ' + str(round(seconds, 2)) + ' sec'
+            for name, seconds in self.startup_times.items()))
 
-        vr_unit_end_pos = 0
-        i = 0
-        for level in self.collection:
-            # Make VR units
-            for frame in level.frames:
-                unit = {"length": frame.width,
-                        "texture_id": texture_ids[i],
-                        "position": vr_unit_end_pos}
-                self.vr_units.append(unit)
-                vr_unit_end_pos = unit['position'] + unit['length']
-                i += 1
-
-            # VR unit of dummy frame
-            unit = {"length": level.dummy_frame.width,
-                    "texture_id": texture_ids[i],
-                    "position": vr_unit_end_pos}
-            self.vr_units.append(unit)
-            vr_unit_end_pos = unit['position'] + unit['length']
-            i += 1
         # Calculate level length
         self.virtual_length = 0
         for vru in self.vr_units:
@@ -596,8 +590,36 @@ class Session(object):
         self.gramophone.reset_time()
         self.gramophone.reset_position()
 
+        # Write the logs and print the messages in the background
+        if not self.skip_save:
+            self.log.start()
+        self.event_log = EventLog(None if self.skip_save else self.log.vrl['events'])
+        self.event_log.start()
+
+        # Send the output commands of Events in the background
+        self.commands = Comms.CommandQueue(self.gramophone)
+        self.commands.start()
+
+        # The simulation state is set before the first tick, which can come
+        # as soon as the acquisition starts
         collection.reset_rules()
-        # Reset all Rule delay timers
+        self.make_rule_tables()
+
+        # Start reading the Gramophone in the background
+        self.acquisition = Comms.Acquisition(self.read_gramophone,
+                                             rate=self.sampling_rate,
+                                             callback=self.simulation.feed)
+        self.acquisition.start()
+        if self.acquisition.wait(timeout=5) is None or \
+                self.acquisition.error is not None:
+            self.acquisition.stop()
+            self.commands.stop()
+            self.event_log.stop()
+            if not self.skip_save:
+                self.log.stop()
+                self.log.close()
+            raise LinMazeError('Could not read the Gramophone.') \
+                from self.acquisition.error
 
         # Schedule main loop
         pyglet.clock.schedule(main_loop)
@@ -607,7 +629,16 @@ class Session(object):
         # Main app run
         pyglet.app.run()
 
+        # Free the video memory while the OpenGL context of the windows
+        # is still there
+        self.renderer.delete()
+        if self.residency is not None:
+            self.residency.delete()
+
         # After main app is closed
+        self.acquisition.stop()
+        self.commands.stop()
+        self.event_log.stop()
         # Reset outputs to 0 and disconnect the Gramophone
         self.gramophone.stop_burst(1)
         self.gramophone.stop_burst(2)
@@ -621,9 +652,206 @@ class Session(object):
 
         # Save all remaining data
         if not self.skip_save:
-            self.log.flush_all()
+            self.log.stop()
             self.log.close()
 
+        if self.acquisition.error is not None:
+            raise LinMazeError('The session was stopped by an error.') \
+                from self.acquisition.error
+
+    def press_key(self, symbol, modifiers):
+        """Handles a key pressed in a window. Called by the simulation.
+
+        :param symbol: The key, see pyglet.window.key.
+        :type symbol: int
+
+        :param modifiers: The modifier keys held down, see pyglet.window.key.
+        :type modifiers: int
+        """
+        if symbol == pyglet.window.key.SPACE:
+            if self.paused:
+                self.unpause()
+            else:
+                self.pause()
+
+        # Check keypress rules
+        for table in self.rule_tables.values():
+            table.press(symbol)
+
+        if modifiers & pyglet.window.key.MOD_CTRL:
+            if symbol == pyglet.window.key._1:
+                target = int(not self.commands.outputs[1])
+                self.commands.write_output(1, target)
+
+            if symbol == pyglet.window.key._2:
+                target = int(not self.commands.outputs[2])
+                self.commands.write_output(2, target)
+
+            if symbol == pyglet.window.key._3:
+                target = int(not self.commands.outputs[3])
+                self.commands.write_output(3, target)
+
+            if symbol == pyglet.window.key._4:
+                target = int(not self.commands.outputs[4])
+                self.commands.write_output(4, target)
+
+            if symbol == pyglet.window.key.LEFT:
+                self.manual_vel += 5
+
+            if symbol == pyglet.window.key.RIGHT:
+                self.manual_vel -= 5
+
+    def step(self, params):
+        """Advances the simulation by one tick: moves with the velocity
+        since the last tick, updates the zone, logs and checks the rules.
+        Called by the simulation.
+
+        :param params: The values of the Gramophone at the time of the tick.
+        :type params: dict
+
+        :returns: The positions of the camera before and after the tick.
+            They are the same if the camera jumped (eg. teleported or
+            looped), so the picture is not moved between them.
+        :rtype: (float, float)
+        """
+        self.last_read = params
+        level = self.collection.active_level
+        previous = self.position
+
+        velocity = round(
+            self.vel_ratio*(params['ENCPOS'] - self.last_position)/14400)
+        velocity += self.manual_vel
+        self.last_position = params['ENCPOS']
+
+        if self.paused:
+            self.movement(0)
+        else:
+            self.movement(velocity)
+
+        self.check_zone()
+
+        if not self.skip_save:
+            self.log.make_entry(velocity, params['TIME'],
+                                params['DI-1'], params['DI-2'],
+                                params['DO-1'],  params['DO-2'],
+                                params['DO-3'],  params['DO-4'])
+
+        self.check_rules(velocity, params['DI-1'], params['DI-2'])
+
+        if self.collection.active_level is not level or \
+                abs(self.position - previous) > abs(velocity):
+            previous = self.position
+        return previous, self.position
+
+    def read_gramophone(self):
+        """Reads the time, position and IO of the Gramophone, with the names
+        of the parameters as keys, and updates the cached states of the
+        outputs. Called by the acquisition thread.
+
+        :rtype: dict
+        """
+        params = {}
+        sent = self.commands.sent
+        for key, val in self.gramophone.read_linmaze_params().items():
+            params[self.gramophone.parameters[key].name] = val
+        self.commands.sync(params, sent)
+        return params
+
+    def make_frame_units(self, register):
+        """Makes a VR unit for every frame and a dummy frame for the end
+        of every level, each with its own texture. Frames that are wider
+        than the largest texture are drawn from several textures.
+
+        :param register: Makes an OpenGL texture and returns its id.
+        :type register: function
+        """
+        max_width = max_texture_size()
+        vr_unit_end_pos = 0
+        for level in self.collection:
+            # Make VR units, the last one is the dummy frame
+            for frame in level.frames + [level.dummy_frame]:
+                unit = {"length": frame.width,
+                        "rgb": frame.rgb,
+                        "offset": vr_unit_end_pos}
+                self.vr_units += split_unit(unit, frame.texture,
+                                            register, max_width)
+                vr_unit_end_pos = unit['offset'] + unit['length']
+
+    def make_atlas_units(self, register):
+        """Makes VR units that draw every level from a few large textures,
+        see atlas_units.
+
+        :param register: Makes an OpenGL texture and returns its id.
+        :type register: function
+        """
+        max_width = max_texture_size()
+        for level in self.collection:
+            for unit in atlas_units(level, register,
+                                    self.collection.screen_width, max_width):
+                unit["offset"] += level.offset
+                self.vr_units.append(unit)
+
+    def index_vr_units(self):
+        """Stores where the VR units start and end relative to the first
+        one. They are moved together by the camera, so these don't change."""
+        self.unit_starts = np.array([vru["offset"] for vru in self.vr_units])
+        self.unit_ends = self.unit_starts + \
+            np.array([vru["length"] for vru in self.vr_units])
+
+    def unit_range(self, start, end):
+        """The indices of the first VR unit between start and end (relative
+        to the first unit) and the one after the last, found by searching
+        the sorted starts and ends of the units.
+
+        :rtype: (int, int)
+        """
+        first = np.searchsorted(self.unit_ends, start, side='right')
+        last = np.searchsorted(self.unit_starts, end, side='left')
+        return int(first), int(last)
+
+    def visible_range(self):
+        """The indices of the first VR unit on the screen and the one after
+        the last.
+
+        :rtype: (int, int)
+        """
+        return self.unit_range(-self.camera,
+                               self.collection.screen_width - self.camera)
+
+    def nearby_textures(self):
+        """The textures of the VR units on the screen, then the ones within
+        prefetch_distance of the screen in the active level. Where the level
+        loops, the units the camera gets to after looping are included.
+
+        :rtype: list
+        """
+        first, last = self.visible_range()
+        units = self.vr_units[first:last]
+
+        level = self.collection.active_level
+        screen_end = level.length + self.collection.screen_width
+        start = -self.camera - level.offset - self.prefetch_distance
+        end = -self.camera - level.offset + self.collection.screen_width \
+            + self.prefetch_distance
+        ranges = [(max(start, 0), min(end, screen_end))]
+        if start < 0:
+            ranges.append((level.length + start, screen_end))
+        if end > level.length:
+            ranges.append((0, end - level.length))
+        for range_start, range_end in ranges:
+            first, last = self.unit_range(level.offset + range_start,
+                                          level.offset + range_end)
+            units += self.vr_units[first:last]
+        return [vru["texture_id"] for vru in units]
+
+    def visible_units(self):
+        """The VR units that are on the screen.
+
+        :rtype: [dict]
+        """
+        first, last = self.visible_range()
+        return self.vr_units[first:last]
+
     def calculate_level_offsets(self):
         offset = 0
         for i, lvl in enumerate(self.collection):
@@ -645,15 +873,10 @@ class Session(object):
         self.position += active.offset  # back to absolute
         self.position = -self.position  # back to negative
 
-        # Image movement
-        img_move = self.position - self.vr_units[0]["position"]
-        for vru in self.vr_units:
-            vru["position"] += img_move
-
         # Virtual movement (position of the "character")
         relative_positive_position = -self.position - active.offset
         limit = active.length - self.collection.zone_offset
-        if relative_positive_position > limit:
+        if relative_positive_position >= limit:
             self.virtual_relative_position = (relative_positive_position
                                               - active.length
                                               + self.collection.zone_offset)
@@ -721,7 +944,7 @@ class Session(object):
     def get_target_level_and_zone(
             self, *target_zones: str):  # -> List[Tuple[Level, Zone.Zone]]:
         ret = []  # List[Tuple[Level, Zone.Zone]] = []
-        print(target_zones)
+        self.log_event('message', "Teleport targets: " + str(target_zones))
         for t in target_zones:
             try:
                 level_name, zone_name = t.split('.')
@@ -731,13 +954,14 @@ class Session(object):
 
             level = self.collection.get_level_by_name(level_name)
             if level is None:
-                print(f"Error: level with name '{level_name}' was not found.")
+                self.log_event(
+                    'error', f"Error: level with name '{level_name}' was not found.")
                 continue
 
             zone = level.get_zone_by_name(zone_name)
             if zone is None:
-                print(f"Error: zone with name '{zone_name}' "
-                      f"was not found in level {level_name}.")
+                self.log_event('error', f"Error: zone with name '{zone_name}' "
+                               f"was not found in level {level_name}.")
                 continue
 
             ret.append((level, zone))
@@ -745,11 +969,35 @@ class Session(object):
 
     def check_zone(self):
         """Updates the current zone."""
-        self.current_zone = next(zone for zone in self.collection.active_level.zones
-                                 if zone.check(self.virtual_relative_position))
+        zone = self.collection.active_level.zone_index.find(
+            self.virtual_relative_position)
+        if zone is not None:
+            self.current_zone = zone
+
+    def make_rule_tables(self):
+        """Groups the Rules of every Level by the signal they check. The
+        delays of all the Rules are waited for by the same Scheduler, on
+        the Gramophone's clock, so they end at the same tick every time a
+        recording is played."""
+        self.scheduler = Scheduler(self.device_time)
+        self.rule_tables = {lvl: Rule.RuleTable(lvl.rules, self.scheduler)
+                            for lvl in self.collection}
+        self.rule_table = None  # The table checked last
+
+    def device_time(self):
+        """The time of the current tick on the Gramophone's clock in seconds.
+        Values not made by the simulation have no TICK_TIME, the time they
+        were read at is used for them.
+
+        :rtype: float
+        """
+        if self.last_read is None:
+            return 0
+        return self.last_read.get('TICK_TIME',
+                                  self.last_read['TIME']) * TIME_UNIT
 
     def check_rules(self, vel, in_1, in_2):
-        """Checks all the rules of the Level.
+        """Checks the rules of the Level that could trigger.
 
         :param vel: The current velocity (for velocity based rules).
         :type vel: int
@@ -760,15 +1008,39 @@ class Session(object):
         :param in_2: The state of input 2
         :type in_2: int
         """
-
-        for rule in self.collection.active_level.rules:
-            # Check zone rules
-            if type(rule) is Rule.ZoneRule:
-                rule.check(self.current_zone.zone_type)
-            # Check speed and velocity rules
-            if type(rule) in [Rule.SpeedRule, Rule.VelocityRule, Rule.SmoothVelocityRule]:
-                rule.check(vel)
-            # Check input rules
-            if type(rule) is Rule.InputRule:
-                rule.check(1, in_1)
-                rule.check(2, in_2)
+        table = self.rule_tables[self.collection.active_level]
+        if table is not self.rule_table:
+            # The Rules of a Level left wait no more, the zone rules of the
+            # Level entered start again
+            if self.rule_table is not None:
+                self.rule_table.restart()
+            table.restart()
+            self.rule_table = table
+        table.check(self.current_zone.zone_type, vel, in_1, in_2)
+
+    def log_event(self, kind, message, rule=None, event=None):
+        """Adds an entry to the event log with the time, position and zone
+        of the Session, without waiting for the console or the disk.
+
+        :param kind: What happened, see EventLog.LogEntry.
+        :type kind: str
+
+        :param message: The message shown in the console.
+        :type message: str
+
+        :param rule: The Rule that triggered, if any.
+        :type rule: Rule.Rule or None
+
+        :param event: The Event that triggered, if any.
+        :type event: Event.Event or None
+        """
+        self.event_log.add(LogEntry(
+            self.runtime.value(),
+            0 if self.last_read is None else self.last_read['TIME'],
+            kind,
+            self.collection.active_level.name,
+            -1 if rule is None else rule.rule_id,
+            '' if event is None else event.name,
+            self.virtual_relative_position,
+            self.current_zone.zone_id,
+            message))
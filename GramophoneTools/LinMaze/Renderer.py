@@ -0,0 +1,183 @@
+"""Draws the VR units of a Session from a vertex buffer."""
+import ctypes
+import itertools
+
+import numpy as np
+from pyglet.gl import *
+
+# A vertex is x, y and the texture coordinates s, t as float32
+VERTEX_SIZE = 4 * ctypes.sizeof(GLfloat)
+
+
+def unit_vertices(vr_units, height):
+    """The quads of the VR units laid out from 0, four vertices for each unit.
+
+    :param vr_units: The VR units with their offsets and lengths. Units
+        drawn from a part of their texture have the horizontal texture
+        coordinates of that part as "s", the whole texture is used otherwise.
+    :type vr_units: [dict]
+
+    :param height: The height of the quads in pixels.
+    :type height: int
+
+    :rtype: np.array of float32 with shape (4*len(vr_units), 4)
+    """
+    vertices = np.empty((len(vr_units), 4, 4), dtype=np.float32)
+    for vru, quad in zip(vr_units, vertices):
+        start = vru["offset"]
+        end = start + vru["length"]
+        s_start, s_end = vru.get("s", (0, 1))
+        quad[:] = [[end, 0, s_end, 0],
+                   [start, 0, s_start, 0],
+                   [start, height, s_start, 1],
+                   [end, height, s_end, 1]]
+    return vertices.reshape(-1, 4)
+
+
+def atlas_units(level, register, screen_width, max_width):
+    """VR units that draw a level from an atlas: its combined strip in as
+    few textures (tiles) as the largest texture size allows. Every block
+    is drawn from its part of the atlas, stretched over its zone like it is
+    from a texture of its own. After the end of the level its beginning is
+    drawn again from the same tiles, instead of from a dummy frame.
+
+    :param level: The rendered level.
+    :type level: Level
+
+    :param register: Makes a texture from a C contiguous array and returns
+        its id, eg. TextureRegistry.register.
+    :type register: function
+
+    :param screen_width: How far the beginning is repeated after the end.
+    :type screen_width: int
+
+    :param max_width: The width of the widest texture that can be made.
+    :type max_width: int
+
+    :returns: The VR units with offsets from the start of the level.
+    """
+    strip = level.combined_frame
+    tile_ids = [register(strip.texture[:, start:start+max_width])
+                for start in range(0, strip.width, max_width)]
+
+    units = []
+    offset, texel = 0, 0
+    for frame in level.frames:
+        texels = frame.texture.shape[1]
+        scale = frame.width / texels if texels else 0
+        # Blocks on the border of two tiles are split in two
+        start = texel
+        while start < texel + texels:
+            tile = start // max_width
+            tile_start = tile * max_width
+            tile_width = min(max_width, strip.width - tile_start)
+            end = min(texel + texels, tile_start + tile_width)
+            units.append({"offset": offset + (start - texel) * scale,
+                          "length": (end - start) * scale,
+                          "texture_id": tile_ids[tile],
+                          "rgb": strip.rgb,
+                          "s": ((start - tile_start) / tile_width,
+                                (end - tile_start) / tile_width)})
+            start = end
+        offset += frame.width
+        texel += texels
+
+    # The beginning again, up to a screen width after the end
+    level_length = offset
+    for vru in itertools.cycle(units[:]):
+        if offset >= level_length + screen_width:
+            break
+        repeated = dict(vru, offset=offset)
+        overhang = offset + vru["length"] - (level_length + screen_width)
+        if overhang > 0:
+            s_start, s_end = vru["s"]
+            repeated["length"] = vru["length"] - overhang
+            repeated["s"] = (s_start, s_start + (s_end - s_start) *
+                             repeated["length"] / vru["length"])
+        units.append(repeated)
+        offset += repeated["length"]
+    return units
+
+
+def texture_key(texture):
+    """What tells the texture of a unit apart from the others: the value
+    of an OpenGL texture id (GLuint objects with the same value are not
+    equal) or the Tile itself when textures are streamed.
+
+    :param texture: The texture_id of a VR unit.
+    :type texture: GLuint or Residency.Tile
+
+    :rtype: int or Residency.Tile
+    """
+    return texture.value if isinstance(texture, GLuint) else texture
+
+
+class Renderer(object):
+    """Puts the quads of the VR units of a Session into a vertex buffer when
+    it is made. Drawing a frame only sets the camera transform and draws
+    the units that are on the screen from the buffer. The buffer is shared
+    by all the windows of the Session. If the Session streams its textures
+    (it has a TextureResidency), the textures near the screen are requested
+    before drawing, and they are bound through the residency.
+
+    :param session: The Session whose VR units are drawn.
+    :type session: Session
+    """
+
+    def __init__(self, session):
+        self.session = session
+        vertices = unit_vertices(session.vr_units,
+                                 session.collection.screen_height)
+
+        self.buffer_id = GLuint(0)
+        glGenBuffers(1, ctypes.byref(self.buffer_id))
+        glBindBuffer(GL_ARRAY_BUFFER, self.buffer_id)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes,
+                     vertices.ctypes.data, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def draw(self, mirrored=False):
+        """Draws the VR units that are on the screen.
+
+        :param mirrored: Should the picture be mirrored horizontally?
+            False by default.
+        :type mirrored: bool
+        """
+        glLoadIdentity()
+        if mirrored:
+            glTranslatef(self.session.collection.screen_width, 0, 0)
+            glScalef(-1, 1, 1)
+        glTranslatef(self.session.camera, 0, 0)
+
+        residency = self.session.residency
+        if residency is not None:
+            residency.request(self.session.nearby_textures())
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.buffer_id)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glVertexPointer(2, GL_FLOAT, VERTEX_SIZE, 0)
+        glTexCoordPointer(2, GL_FLOAT, VERTEX_SIZE, 2 * ctypes.sizeof(GLfloat))
+
+        first, last = self.session.visible_range()
+        bound = None
+        for index in range(first, last):
+            vru = self.session.vr_units[index]
+            glColor3f(*vru["rgb"])  # Tints luminance textures
+            texture = vru["texture_id"]
+            if texture_key(texture) != bound:
+                # Units drawn from one atlas share the texture
+                bound = texture_key(texture)
+                if residency is not None:
+                    residency.bind(texture)
+                else:
+                    glBindTexture(GL_TEXTURE_2D, texture)
+            glDrawArrays(GL_QUADS, 4 * index, 4)
+
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def delete(self):
+        """Frees the vertex buffer."""
+        glDeleteBuffers(1, ctypes.byref(self.buffer_id))
@@ -0,0 +1,308 @@
+"""Uploads the textures of a Session to video memory when they are needed."""
+import ctypes
+import time
+
+import numpy as np
+from pyglet.gl import *
+
+
+def texture_format(texture):
+    """The OpenGL format of a texture, greyscale frames are luminance
+    textures that are tinted when they are drawn.
+
+    :param texture: A 2D (luminance) or 3D (RGB) texture.
+    :type texture: np.ndarray
+    """
+    return GL_LUMINANCE if texture.ndim == 2 else GL_RGB
+
+
+# Mipmaps are only made for the min filters that sample them
+MIPMAP_FILTERS = (GL_NEAREST_MIPMAP_NEAREST, GL_LINEAR_MIPMAP_NEAREST,
+                  GL_NEAREST_MIPMAP_LINEAR, GL_LINEAR_MIPMAP_LINEAR)
+
+
+class TextureUploader(object):
+    """Makes the OpenGL textures of a Session with its filters, and keeps
+    the size and upload time of every texture.
+
+    :param min_filter: The filter of textures drawn smaller than their size.
+        GL_NEAREST by default.
+    :type min_filter: int
+
+    :param mag_filter: The filter of textures drawn larger than their size.
+        GL_NEAREST by default.
+    :type mag_filter: int
+    """
+
+    def __init__(self, min_filter=GL_NEAREST, mag_filter=GL_NEAREST):
+        self.min_filter = min_filter
+        self.mag_filter = mag_filter
+        self.uploads = []  # (width, height, bytes, seconds) of every texture
+
+    @property
+    def mipmaps(self):
+        """Are mipmaps made for the textures?"""
+        return self.min_filter in MIPMAP_FILTERS
+
+    def upload(self, texture, pixels=None):
+        """Makes an OpenGL texture and returns its id.
+
+        :param texture: A C contiguous texture.
+        :type texture: np.ndarray
+
+        :param pixels: Where the pixels are: an address in memory or an
+            offset in the bound pixel unpack buffer. The pixels of texture
+            by default.
+        :type pixels: int or None
+        """
+        start = time.perf_counter()
+        if pixels is None:
+            pixels = texture.ctypes.data
+        tex_format = texture_format(texture)
+        tid = GLuint(0)
+        glGenTextures(1, ctypes.byref(tid))
+
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glBindTexture(GL_TEXTURE_2D, tid)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, self.min_filter)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, self.mag_filter)
+        glTexImage2D(GL_TEXTURE_2D, 0, tex_format, texture.shape[1], texture.shape[0],
+                     0, tex_format, GL_UNSIGNED_BYTE, pixels)
+        nbytes = texture.nbytes
+        if self.mipmaps:
+            glGenerateMipmap(GL_TEXTURE_2D)
+            nbytes = nbytes * 4 // 3  # The smaller levels add about a third
+
+        self.uploads.append((texture.shape[1], texture.shape[0], nbytes,
+                             time.perf_counter() - start))
+        return tid
+
+    @property
+    def total_bytes(self):
+        """The video memory of all the uploaded textures in bytes."""
+        return sum(upload[2] for upload in self.uploads)
+
+    @property
+    def total_time(self):
+        """How long all the uploads took in seconds."""
+        return sum(upload[3] for upload in self.uploads)
+
+    def report(self, per_texture=False):
+        """Prints the number, size and upload time of the textures.
+
+        :param per_texture: Should every texture be listed? False by default.
+        :type per_texture: bool
+        """
+        if per_texture:
+            for num, (width, height, nbytes, seconds) in enumerate(self.uploads):
+                print('Texture #%-4d - Size: %d×%d - %7.1f kB - %6.2f ms' %
+                      (num + 1, width, height, nbytes / 1024, seconds * 1000))
+        print('Uploaded', len(self.uploads), 'textures,',
+              str(round(self.total_bytes / 1024**2, 1)), 'MB in',
+              str(round(self.total_time, 2)), 'sec',
+              '(with mipmaps)' if self.mipmaps else '(without mipmaps)')
+
+
+def max_texture_size():
+    """The width (and height) of the largest texture the driver can make.
+
+    :rtype: int
+    """
+    size = GLint(0)
+    glGetIntegerv(GL_MAX_TEXTURE_SIZE, ctypes.byref(size))
+    return size.value
+
+
+def split_unit(unit, texture, register, max_width):
+    """Splits a VR unit into units that are drawn from parts of its texture
+    no wider than max_width, each part is a texture of its own.
+
+    :param unit: The VR unit, with its offset and length.
+    :type unit: dict
+
+    :param texture: The texture of the unit.
+    :type texture: np.ndarray
+
+    :param register: Makes a texture from a C contiguous array and returns
+        its id, eg. TextureRegistry.register.
+    :type register: function
+
+    :param max_width: The width of the widest texture that can be made.
+    :type max_width: int
+
+    :rtype: [dict]
+    """
+    width = texture.shape[1]
+    if width <= max_width:
+        return [dict(unit, texture_id=register(texture))]
+
+    scale = unit["length"] / width
+    parts = []
+    for start in range(0, width, max_width):
+        part = texture[:, start:start+max_width]
+        parts.append(dict(unit, offset=unit["offset"] + start * scale,
+                          length=part.shape[1] * scale,
+                          texture_id=register(part)))
+    return parts
+
+
+class Tile(object):
+    """A texture that is kept in main memory and is only in video memory
+    while it is resident.
+
+    :param texture: The pixels of the tile.
+    :type texture: np.ndarray
+    """
+
+    def __init__(self, texture):
+        self.texture = texture
+        self.nbytes = texture.nbytes
+        self.texture_id = None  # Not resident
+        self.last_used = 0
+
+    @property
+    def resident(self):
+        """Is the tile in video memory?"""
+        return self.texture_id is not None
+
+
+class TextureResidency(object):
+    """Keeps only the textures (tiles) near the screen in video memory.
+    Tiles are added without uploading them. Every frame the tiles that are
+    near the screen are requested: the ones that are not resident are
+    uploaded a few at a time, so a frame doesn't wait for many uploads.
+    The pixels are copied into a pixel buffer object on the drawing
+    thread, the driver copies them from there to video memory. If the
+    resident tiles don't
+    fit in the budget, the least recently used ones that were not
+    requested are deleted.
+
+    :param budget: How many bytes of tiles can be resident. Set to None to
+        keep every tile that was uploaded. None by default.
+    :type budget: int or None
+
+    :param upload_limit: How many bytes of tiles are uploaded ahead in a
+        frame at most. A tile larger than this is uploaded alone in a
+        frame. 8 MB by default.
+    :type upload_limit: int
+
+    :param uploader: Makes the textures of the tiles. A TextureUploader
+        with the default filters by default.
+    :type uploader: TextureUploader or None
+    """
+
+    def __init__(self, budget=None, upload_limit=8*1024**2, uploader=None):
+        self.budget = budget
+        self.uploader = uploader if uploader is not None else TextureUploader()
+        self.upload_limit = upload_limit
+        self.tiles = []
+        self.resident_bytes = 0
+        self.frame = 0
+        self.uploads = 0
+        self.misses = 0  # Tiles that were drawn before they were uploaded
+        self.buffer_id = None
+
+    def add(self, texture):
+        """Returns a tile of the texture, it is uploaded when it is
+        requested or drawn. Can be used as the upload of a TextureRegistry.
+
+        :param texture: A C contiguous texture.
+        :type texture: np.ndarray
+
+        :rtype: Tile
+        """
+        tile = Tile(texture)
+        self.tiles.append(tile)
+        return tile
+
+    def request(self, tiles):
+        """Uploads the tiles that will be drawn soon ahead, and frees the
+        ones that are not needed if the budget is exceeded.
+
+        :param tiles: The tiles near the screen, the closest first.
+        :type tiles: [Tile]
+        """
+        self.frame += 1
+        for tile in tiles:
+            tile.last_used = self.frame
+
+        # The closest tiles first, at least one of them even if it is larger
+        # than the limit
+        uploaded = 0
+        for tile in tiles:
+            if tile.resident:
+                continue
+            if uploaded and uploaded + tile.nbytes > self.upload_limit:
+                break
+            self.upload(tile)
+            uploaded += tile.nbytes
+        self.evict()
+
+    def bind(self, tile):
+        """Binds the texture of a tile, uploading it first if it is not
+        resident (eg. after a teleport).
+
+        :param tile: The tile that is drawn.
+        :type tile: Tile
+        """
+        if not tile.resident:
+            self.misses += 1
+            self.upload(tile)
+        tile.last_used = self.frame
+        glBindTexture(GL_TEXTURE_2D, tile.texture_id)
+
+    def upload(self, tile):
+        """Makes the texture of a tile from a pixel buffer object.
+
+        :param tile: The tile that is uploaded.
+        :type tile: Tile
+        """
+        if self.buffer_id is None:
+            self.buffer_id = GLuint(0)
+            glGenBuffers(1, ctypes.byref(self.buffer_id))
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, self.buffer_id)
+        # New storage, so a previous upload from the buffer isn't waited for
+        glBufferData(GL_PIXEL_UNPACK_BUFFER, tile.nbytes, None, GL_STREAM_DRAW)
+        address = glMapBuffer(GL_PIXEL_UNPACK_BUFFER, GL_WRITE_ONLY)
+        mapped = (ctypes.c_ubyte * tile.nbytes).from_address(address)
+        np.frombuffer(mapped, dtype=np.uint8).reshape(tile.texture.shape)[...] = \
+            tile.texture
+        glUnmapBuffer(GL_PIXEL_UNPACK_BUFFER)
+
+        tile.texture_id = self.uploader.upload(tile.texture, 0)
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+        self.resident_bytes += tile.nbytes
+        self.uploads += 1
+
+    def evict(self):
+        """Deletes the least recently used tiles until the resident ones fit
+        in the budget. Tiles used in this frame are kept."""
+        if self.budget is None or self.resident_bytes <= self.budget:
+            return
+        resident = sorted((tile for tile in self.tiles if tile.resident),
+                          key=lambda tile: tile.last_used)
+        for tile in resident:
+            if self.resident_bytes <= self.budget or tile.last_used == self.frame:
+                break
+            self.free(tile)
+
+    def free(self, tile):
+        """Deletes the texture of a tile from video memory.
+
+        :param tile: A resident tile.
+        :type tile: Tile
+        """
+        glDeleteTextures(1, ctypes.byref(tile.texture_id))
+        tile.texture_id = None
+        self.resident_bytes -= tile.nbytes
+
+    def delete(self):
+        """Frees every resident tile and the pixel buffer object."""
+        for tile in self.tiles:
+            if tile.resident:
+                self.free(tile)
+        if self.buffer_id is not None:
+            glDeleteBuffers(1, ctypes.byref(self.buffer_id))
+            self.buffer_id = None
@@ -1,15 +1,13 @@
 """ Triggers an event on a given criteria """
-from statistics import mean
-from collections import deque
 from abc import ABC, abstractmethod
 
-import numpy as np
 import pyglet
 
 from GramophoneTools.LinMaze import Event
 from GramophoneTools.LinMaze import Level
 
-from GramophoneTools.LinMaze.Tools.Timer import Timer
+from GramophoneTools.LinMaze.Tools.RollingWindow import RollingWindow
+from GramophoneTools.LinMaze.Tools.Scheduler import Scheduler
 
 
 class Rule(ABC):
@@ -26,15 +24,15 @@ class Rule(ABC):
     def __init__(self, level, event):
         self.level: Level = level
         self.event: Event.Event = event
+        self.rule_id = None  # Set by the Session
         self.done = False
 
     def trigger(self):
-        """ Triggers the associated event and prints out a message about it. """
+        """ Triggers the associated event and logs a message about it. """
         if self.event.triggerable:
-            print(self, "rule triggered")
+            self.event.log('rule', str(self) + " rule triggered", self)
             self.event.trigger()
             self.done = True
-            # print(self.event)
 
     @abstractmethod
     def check(self, *arg):
@@ -42,7 +40,57 @@ class Rule(ABC):
         pass
 
 
-class ZoneRule(Rule):
+class DelayedRule(Rule):
+    """
+    Generic Rule that triggers when its condition held for a delay. The
+    delay is waited for with the Scheduler of the RuleTable the Rule is
+    checked by, so the Rule is called back when it is over instead of
+    checking the time on every tick. The Scheduler is only run when the
+    Rules are checked, so the Rule triggers at the first tick at or after
+    the end of its delay, at most a tick period late (1/60 sec by default,
+    see Simulation).
+
+    :param level: The Level this Rule is active on.
+    :type level: Level
+
+    :param event: The event the rule triggers.
+    :type event: Event.Event
+
+    :param delay: How many seconds the condition should hold before triggering.
+    :type delay: float
+    """
+
+    def __init__(self, level, event, delay):
+        super().__init__(level, event)
+        self.delay = delay
+        self.active = False
+        self.scheduler = None  # Set by the RuleTable
+        self.deadline = None
+
+    def wait(self, delay):
+        """
+        Schedules the call of expire.
+
+        :param delay: How many seconds from now.
+        :type delay: float
+        """
+        self.deadline = self.scheduler.call_later(delay, self.expire)
+
+    def reset(self):
+        """ Deactivates the Rule and cancels the end of its delay. """
+        self.active = False
+        self.done = False
+        if self.deadline is not None:
+            self.deadline.cancel()
+            self.deadline = None
+
+    @abstractmethod
+    def expire(self):
+        """ Called by the Scheduler when the delay is over. """
+        pass
+
+
+class ZoneRule(DelayedRule):
     """ 
     A Rule that triggers if the animal is in a given type of zone.
 
@@ -60,11 +108,8 @@ class ZoneRule(Rule):
     """
 
     def __init__(self, level, event, zone_type, delay):
-        super().__init__(level, event)
+        super().__init__(level, event, delay)
         self.zone_type = zone_type
-        self.delay = delay
-        self.delay_timer = Timer(delay)
-        self.active = False
 
     def __str__(self):
         return "In " + str(self.zone_type) + " zone for " + str(self.delay) + " sec"
@@ -76,29 +121,28 @@ class ZoneRule(Rule):
         :param current_zone_type: Type of the curren zone.
         :type current_zone_type: str
         """
-        # print('Checking ',self)
-        # print('CZ',current_zone_type)
         if current_zone_type == self.zone_type:
             if not self.active and not self.done:
                 # Zone entry >> Rule activation
-                self.delay_timer.reset()
                 self.active = True
-            if self.active and self.delay_timer.is_running() and not self.done:
-                # Waiting for timer to run out
-                pass
-            if self.active and not self.delay_timer.is_running() and not self.done:
-                # Timer ran out, trigger event
-                self.trigger()
-                if type(self.event) == Event.RandomTeleport:
-                    self.done = False
-                    self.active = False
+                self.wait(self.delay)
         else:
-            # print('current',current_zone_type,'not in',self.zone_type)
+            self.reset()
+
+    def expire(self):
+        """ Triggers the event when the delay in the zone is over. """
+        self.deadline = None
+        self.trigger()
+        if type(self.event) == Event.RandomTeleport:
+            # Landed in a zone again, wait for the delay again
             self.done = False
-            self.active = False
+            self.wait(self.delay)
+        elif not self.done:
+            # The event could not be triggered, try again at the next tick
+            self.wait(0)
 
 
-class VelocityRule(Rule):
+class VelocityRule(DelayedRule):
     """
     A Rule that triggers if the velocity is above or below a certain threshold.
 
@@ -119,12 +163,10 @@ class VelocityRule(Rule):
     """
 
     def __init__(self, level, event, vel_rule_type, threshold, delay):
-        super().__init__(level, event)
+        super().__init__(level, event, delay)
         self.vel_rule_type = vel_rule_type
         self.threshold = threshold
-        self.delay = delay
-        self.delay_timer = Timer(delay)
-        self.active = False
+        self.elapsed = False  # The delay was over while not active
 
     def __str__(self):
         return "Velocity " + str(self.vel_rule_type) + " " + str(self.threshold) +\
@@ -132,31 +174,48 @@ class VelocityRule(Rule):
 
     def check(self, vel):
         """ 
-        Check whether the Velocity rule should be triggered.
+        Check whether the Velocity rule should be triggered. The delay
+        starts at the first check and again at every check the velocity is
+        on the wrong side of the threshold, a velocity equal to the
+        threshold keeps the Rule as it was. So the Rule triggers when the
+        delay is over since the velocity was last on the wrong side, if it
+        was on the right side since then.
 
         :param vel: The current velocity.
         :type vel: int
         """
+        holds = broken = False
         if self.vel_rule_type == "above":
-            if abs(vel) > self.threshold:
-                self.active = True
-            if abs(vel) < self.threshold:
-                self.active = False
-                self.done = False
-                self.delay_timer.reset()
-
+            holds, broken = abs(vel) > self.threshold, abs(vel) < self.threshold
         if self.vel_rule_type == "below":
-            if abs(vel) < self.threshold:
-                self.active = True
-            if abs(vel) > self.threshold:
-                self.active = False
-                self.done = False
-                self.delay_timer.reset()
-
-        if self.active and not self.done and not self.delay_timer.is_running():
+            holds, broken = abs(vel) < self.threshold, abs(vel) > self.threshold
+
+        if holds:
+            self.active = True
+        if broken:
+            self.reset()
+        if self.deadline is None and (self.active or not self.elapsed):
+            # Trigger at once if the delay was over before the velocity got
+            # to the right side
+            self.wait(0 if self.elapsed else self.delay)
+
+    def reset(self):
+        """ Deactivates the Rule and starts its delay again at the next
+        check. """
+        super().reset()
+        self.elapsed = False
+
+    def expire(self):
+        """ Triggers the event if the velocity got to the right side of the
+        threshold since it was last on the wrong side, then waits for the
+        delay again. """
+        self.deadline = None
+        if self.active:
             self.trigger()
-            self.delay_timer.reset()
             self.done = False
+            self.wait(self.delay)
+        else:
+            self.elapsed = True
 
 
 class SmoothVelocityRule(VelocityRule):
@@ -185,7 +244,7 @@ class SmoothVelocityRule(VelocityRule):
     def __init__(self, level, event, bin_size, vel_rule_type, threshold, delay):
         super().__init__(level, event, vel_rule_type, threshold, delay)
         self.bin_size = bin_size
-        self.vels = deque([], bin_size)
+        self.vels = RollingWindow(bin_size)
 
     def __str__(self):
         return "Smooth velocity (avg. of "+str(self.bin_size)+") " \
@@ -200,8 +259,7 @@ class SmoothVelocityRule(VelocityRule):
         :type vel: int
         """
         self.vels.append(vel)
-        smooth_vel = mean(self.vels)
-        super().check(smooth_vel)
+        super().check(self.vels.mean)
 
 
 class SpeedRule(Rule):
@@ -231,7 +289,7 @@ class SpeedRule(Rule):
         self.speed_rule_type = speed_rule_type
         self.threshold = threshold
         self.bin_size = bin_size
-        self.record = np.zeros(bin_size)
+        self.record = RollingWindow(bin_size, filled=True)
 
     def __str__(self):
         return "Absolute sum of the last " + str(self.bin_size) + " velocities " +\
@@ -243,9 +301,8 @@ class SpeedRule(Rule):
         :param vel: The current velocity.
         :type vel: int
         """
-        self.record[:-1] = self.record[1:]
-        self.record[-1] = abs(vel)
-        norm = sum(self.record)
+        self.record.append(vel)
+        norm = self.record.abs_sum
 
         if self.speed_rule_type == "above":
             if norm > self.threshold and not self.done:
@@ -274,12 +331,13 @@ class KeyPressRule(Rule):
     def __init__(self, level, event, key):
         super().__init__(level, event)
         self.key = key.upper()
+        self.symbol = self.keys[self.key]
 
     def __str__(self):
         return self.key + " keypress"
 
     def check(self, key):
-        if key == self.keys[self.key]:
+        if key == self.symbol:
             self.trigger()
 
 
@@ -317,3 +375,113 @@ class InputRule(Rule):
                     self.trigger()
 
             self.last_state = state
+
+
+class RuleTable(object):
+    """
+    The Rules of a Level grouped by the signal they check, so every tick
+    only the Rules that can trigger are checked.
+
+    Zone rules are grouped by their zone type and are checked when the
+    type of the current zone changes. The delays of zone and velocity
+    rules are waited for with a Scheduler, which is run at the end of
+    every check, so they end at a tick, not between two ticks. Key press
+    rules are looked up by the symbol of the key, input rules by the number
+    of the input.
+
+    :param rules: The Rules of a Level.
+    :type rules: [Rule]
+
+    :param scheduler: Waits for the delays of the Rules. Can be shared by the
+        RuleTables of a Session. A new one is made by default.
+    :type scheduler: Tools.Scheduler.Scheduler or None
+    """
+
+    def __init__(self, rules, scheduler=None):
+        self.scheduler = Scheduler() if scheduler is None else scheduler
+        self.zone = {}  # zone_type: [ZoneRule]
+        self.velocity = []
+        self.input = {}  # input_id: [InputRule]
+        self.key = {}  # symbol: [KeyPressRule]
+        for rule in rules:
+            if isinstance(rule, DelayedRule):
+                rule.scheduler = self.scheduler
+            if type(rule) is ZoneRule:
+                self.zone.setdefault(rule.zone_type, []).append(rule)
+            if type(rule) in [SpeedRule, VelocityRule, SmoothVelocityRule]:
+                self.velocity.append(rule)
+            if type(rule) is InputRule:
+                self.input.setdefault(rule.input_id, []).append(rule)
+            if type(rule) is KeyPressRule:
+                self.key.setdefault(rule.symbol, []).append(rule)
+
+        self.zone_type = None  # The type of the zone at the last check
+
+    def __len__(self):
+        return sum(len(rules) for rules in self.zone.values()) + \
+            len(self.velocity) + \
+            sum(len(rules) for rules in self.input.values()) + \
+            sum(len(rules) for rules in self.key.values())
+
+    def check(self, zone_type, vel, in_1, in_2):
+        """
+        Checks the Rules that depend on the zone, the velocity and the
+        inputs, then triggers the Rules whose delay is over.
+
+        :param zone_type: The type of the current zone.
+        :type zone_type: str
+
+        :param vel: The current velocity.
+        :type vel: int
+
+        :param in_1: The state of input 1
+        :type in_1: int
+
+        :param in_2: The state of input 2
+        :type in_2: int
+        """
+        self.check_zone(zone_type)
+        for rule in self.velocity:
+            rule.check(vel)
+        for rule in self.input.get(1, []):
+            rule.check(1, in_1)
+        for rule in self.input.get(2, []):
+            rule.check(2, in_2)
+        self.scheduler.run()
+
+    def check_zone(self, zone_type):
+        """
+        Resets the zone rules of the zone left and activates the ones of
+        the zone entered, if the type of the zone changed.
+
+        :param zone_type: The type of the current zone.
+        :type zone_type: str
+        """
+        if zone_type != self.zone_type:
+            for rule in self.zone.get(self.zone_type, []):
+                rule.check(zone_type)
+            self.zone_type = zone_type
+            for rule in self.zone.get(zone_type, []):
+                rule.check(zone_type)
+
+    def restart(self):
+        """ Resets every zone and velocity rule with a delay and forgets
+        the last zone, so the rules start again at the next tick (eg. after
+        the Level was not played for a while). """
+        for rules in self.zone.values():
+            for rule in rules:
+                rule.reset()
+        for rule in self.velocity:
+            if isinstance(rule, DelayedRule):
+                rule.reset()
+        self.zone_type = None
+
+    def press(self, symbol):
+        """
+        Checks the key press rules of a key.
+
+        :param symbol: The key pressed, see pyglet.window.key.
+        :type symbol: int
+        """
+        for rule in self.key.get(symbol, []):
+            rule.check(symbol)
@@ -0,0 +1,122 @@
+"""Advances a Session at a fixed rate by the clock of the Gramophone."""
+import queue
+from time import monotonic
+
+# The Gramophone's clock (TIME) counts in 0.1 ms
+TIME_UNIT = 1e-4
+
+
+def values_at(before, after, tick_time):
+    """The values of the Gramophone at a time between two reads. The
+    position is interpolated, the inputs, the outputs and the TIME are the
+    ones read last before that time, so the TIME logged is always a value
+    of the Gramophone's clock. The time itself is added as TICK_TIME.
+
+    :param before: The values of the read before tick_time.
+    :type before: dict
+
+    :param after: The values of the first read at or after tick_time.
+    :type after: dict
+
+    :param tick_time: The time on the Gramophone's clock.
+    :type tick_time: float
+
+    :rtype: dict
+    """
+    values = dict(after if tick_time >= after['TIME'] else before)
+    span = after['TIME'] - before['TIME']
+    if span > 0:
+        ratio = (tick_time - before['TIME']) / span
+        values['ENCPOS'] = int(round(before['ENCPOS'] +
+                                     ratio * (after['ENCPOS'] - before['ENCPOS'])))
+    values['TICK_TIME'] = tick_time
+    return values
+
+
+class Simulation(object):
+    """Steps a Session at a fixed tick rate. The ticks follow the clock of
+    the Gramophone (TIME), not the frames, so movement, zones, rules and
+    the log don't depend on the refresh rate of the monitors or on
+    dropped frames. Every read of the Gramophone is fed to the Simulation,
+    which steps the Session for all the ticks up to the time of the read.
+    Key presses are queued and handled at the next tick, so the Session is
+    only changed by the thread that steps it.
+
+    The camera is drawn between the positions of the last two ticks, as
+    far as the time since the last tick is from the tick period.
+
+    :param step: Advances the simulation by one tick, given the values of
+        the Gramophone at the time of the tick, eg. Session.step. Returns
+        the positions of the camera before and after the tick.
+    :type step: function
+
+    :param press_key: Handles a key press with its symbol and modifiers,
+        eg. Session.press_key.
+    :type press_key: function
+
+    :param tick_rate: How many ticks are in a second of the Gramophone's
+        clock. 60 by default.
+    :type tick_rate: float
+    """
+
+    def __init__(self, step, press_key, tick_rate=60):
+        self.step = step
+        self.press_key = press_key
+        self.tick_rate = tick_rate
+        self.tick_period = 1 / (tick_rate * TIME_UNIT)  # In clock units
+        self.keys = queue.SimpleQueue()
+        self.last_values = None
+        self.start = None  # The clock time of the first read
+        self.ticks = 0
+        # The clock time of the last tick, and the positions before and
+        # after it, replaced together after every tick
+        self.state = None
+
+    def feed(self, sample):
+        """Steps the Session for the ticks up to the time of a sample.
+
+        :param sample: A read of the Gramophone, see Comms.Acquisition.
+        :type sample: Comms.Sample
+        """
+        values = sample.values
+        if self.last_values is None:
+            self.start = values['TIME']
+        else:
+            while self.next_tick <= values['TIME']:
+                self.tick(values_at(self.last_values, values, self.next_tick))
+        self.last_values = values
+
+    @property
+    def next_tick(self):
+        """The clock time of the next tick."""
+        return self.start + (self.ticks + 1) * self.tick_period
+
+    def tick(self, values):
+        """Handles the queued key presses, steps the Session once and
+        publishes the new state.
+
+        :param values: The values of the Gramophone at the tick.
+        :type values: dict
+        """
+        while not self.keys.empty():
+            self.press_key(*self.keys.get())
+        previous, current = self.step(values)
+        self.ticks += 1
+        self.state = (values['TICK_TIME'], previous, current)
+
+    def camera(self, sample):
+        """Where the camera should be now, between the last two ticks.
+
+        :param sample: The latest read of the Gramophone, used to tell the
+            time on its clock.
+        :type sample: Comms.Sample
+
+        :rtype: float or None
+        """
+        state = self.state
+        if state is None:
+            return None
+        tick_time, previous, current = state
+        now = sample.values['TIME'] + (monotonic() - sample.time) / TIME_UNIT
+        progress = min(max((now - tick_time) / self.tick_period, 0), 1)
+        return previous + (current - previous) * progress
@@ -0,0 +1,70 @@
+""" The last few values of a signal with their running sum """
+
+
+class RollingWindow(object):
+    """
+    A ring buffer of the last values appended to it, that keeps their sum
+    and absolute sum up to date, so appending and reading them takes the
+    same time regardless of the size of the window.
+
+    :param size: How many values the window holds.
+    :type size: int
+
+    :param filled: Whether the window starts full of zeros instead of empty.
+    :type filled: bool
+
+    :param recompute: Recalculate the sums from the stored values after this
+        many appends, so rounding errors of float values do not add up.
+        None never recalculates.
+    :type recompute: int or None
+    """
+
+    def __init__(self, size, filled=False, recompute=10000):
+        if size < 1:
+            raise ValueError('The size of a RollingWindow must be at least 1')
+        self.size = size
+        self.values = [0] * size
+        self.count = size if filled else 0
+        self.index = 0
+        self.sum = 0
+        self.abs_sum = 0
+        self.recompute = recompute
+        self.appends = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def mean(self):
+        """ The mean of the values in the window. """
+        if not self.count:
+            raise ValueError('The mean of an empty RollingWindow is undefined')
+        return self.sum / self.count
+
+    def append(self, value):
+        """
+        Add a value to the window, dropping the oldest one if it is full.
+
+        :param value: The new value.
+        :type value: float
+        """
+        if self.count == self.size:
+            old = self.values[self.index]
+            self.sum -= old
+            self.abs_sum -= abs(old)
+        else:
+            self.count += 1
+        self.values[self.index] = value
+        self.sum += value
+        self.abs_sum += abs(value)
+        self.index = (self.index + 1) % self.size
+
+        self.appends += 1
+        if self.recompute and self.appends % self.recompute == 0:
+            self.recalculate()
+
+    def recalculate(self):
+        """ Calculate the sums again from the values in the window. """
+        # The unfilled slots are zeros, so they do not change the sums
+        self.sum = sum(self.values)
+        self.abs_sum = sum(abs(value) for value in self.values)
@@ -0,0 +1,114 @@
+""" Calls functions when their deadline comes """
+import heapq
+import itertools
+import time
+
+
+class Deadline(object):
+    """
+    A function scheduled to be called by a Scheduler at a given time.
+
+    :param when: The time of the call on the clock of the Scheduler.
+    :type when: float
+
+    :param callback: The function to call, without arguments.
+    :type callback: function
+    """
+
+    def __init__(self, when, callback):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        """ Stops the function from being called. """
+        self.cancelled = True
+
+
+class Scheduler(object):
+    """
+    Keeps deadlines in a heap ordered by their time, so only the deadlines
+    that are due are looked at when it is run. Cancelling a deadline just
+    marks it, it is dropped from the heap when its time comes. The
+    functions are only called when the Scheduler is run, so they are late
+    by up to the time between two runs.
+
+    :param clock: Tells the current time in seconds, eg. the time of the
+        current tick of a Session. time.monotonic by default.
+    :type clock: function
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.deadlines = []  # Heap of (when, order, Deadline)
+        self.order = itertools.count()  # Keeps the heap from comparing deadlines
+
+    def call_at(self, when, callback):
+        """
+        Schedules a function to be called at the given time.
+
+        :param when: The time on the clock of the Scheduler.
+        :type when: float
+
+        :param callback: The function to call, without arguments.
+        :type callback: function
+
+        :rtype: Deadline
+        """
+        deadline = Deadline(when, callback)
+        heapq.heappush(self.deadlines, (when, next(self.order), deadline))
+        return deadline
+
+    def call_later(self, delay, callback):
+        """
+        Schedules a function to be called after the given delay.
+
+        :param delay: How many seconds from now.
+        :type delay: float
+
+        :param callback: The function to call, without arguments.
+        :type callback: function
+
+        :rtype: Deadline
+        """
+        return self.call_at(self.clock() + delay, callback)
+
+    @property
+    def next_deadline(self):
+        """ The time of the first deadline that is not cancelled, or None. """
+        while self.deadlines and self.deadlines[0][2].cancelled:
+            heapq.heappop(self.deadlines)
+        return self.deadlines[0][0] if self.deadlines else None
+
+    def run(self, now=None):
+        """
+        Calls the functions whose deadline is due, in the order of their
+        deadlines. Deadlines scheduled by these functions are called at the
+        next run at the earliest, so a function that schedules itself again
+        without a delay is called once per run.
+
+        :param now: The current time on the clock of the Scheduler. Read
+            from the clock by default.
+        :type now: float or None
+
+        :returns: How many functions were called.
+        :rtype: int
+        """
+        if now is None:
+            now = self.clock()
+        last = next(self.order)
+        called = 0
+        while self.deadlines and self.deadlines[0][0] <= now \
+                and self.deadlines[0][1] < last:
+            deadline = heapq.heappop(self.deadlines)[2]
+            if not deadline.cancelled:
+                deadline.cancelled = True  # Cancelling it later does nothing
+                deadline.callback()
+                called += 1
+        return called
+
+    def clear(self):
+        """ Cancels every deadline. """
+        for _, _, deadline in self.deadlines:
+            deadline.cancel()
+        self.deadlines = []
@@ -0,0 +1,144 @@
+""" Persistent storage for rendered Frame textures """
+import os
+import tempfile
+
+import numpy as np
+
+
+class TextureCache(object):
+    """A directory of textures saved as .npy files that are loaded as
+    memory maps. When the files take up more space than the size limit
+    the least recently used ones are deleted.
+
+    :param directory: Where the textures are stored. Set to None to use the
+        GRAMOPHONE_CACHE environment variable or ~/.gramophone/texture_cache
+        if it is not set. None by default.
+    :type directory: str or None
+
+    :param size_limit: The maximum size of the stored textures in bytes.
+        2 GiB by default.
+    :type size_limit: int
+    """
+
+    def __init__(self, directory=None, size_limit=2*1024**3):
+        if directory is None:
+            directory = os.environ.get(
+                'GRAMOPHONE_CACHE',
+                os.path.join(os.path.expanduser('~'), '.gramophone', 'texture_cache'))
+        self.directory = directory
+        self.size_limit = size_limit
+
+    def __repr__(self):
+        return 'TextureCache(' + repr(self.directory) + ', size_limit=' + \
+            str(self.size_limit) + ')'
+
+    def path(self, key):
+        """The file a texture with the given key is stored in."""
+        return os.path.join(self.directory, key + '.npy')
+
+    def load(self, key):
+        """Returns the stored texture with the given key or None if there
+        isn't one. The texture is a copy-on-write memory map of the file.
+
+        :param key: The key the texture was stored with.
+        :type key: str
+
+        :rtype: np.ndarray or None
+        """
+        path = self.path(key)
+        try:
+            texture = np.load(path, mmap_mode='c')
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Damaged file, make it again
+            self.remove(key)
+            return None
+
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        return np.asarray(texture)
+
+    def store(self, key, texture):
+        """Saves a texture with the given key, then makes room if the
+        cache got larger than its size limit.
+
+        :param key: The key the texture can be loaded with.
+        :type key: str
+
+        :param texture: The texture to store.
+        :type texture: np.ndarray
+        """
+        if texture.nbytes > self.size_limit:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                np.save(temp_file, texture)
+            os.replace(temp_path, self.path(key))
+        except OSError:
+            # Another process is using the file, it stored the same texture
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        self.evict()
+
+    def remove(self, key):
+        """Deletes the texture with the given key if it is stored."""
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+    def entries(self):
+        """The stored files as (last use, size, path) tuples, least recently
+        used first."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+
+        for name in names:
+            if not name.endswith('.npy'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    @property
+    def size(self):
+        """The size of all the stored textures in bytes."""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Deletes the least recently used textures until the cache fits
+        into its size limit."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.size_limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # Still mapped by someone
+            total -= size
+
+    def clear(self):
+        """Deletes all the stored textures."""
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
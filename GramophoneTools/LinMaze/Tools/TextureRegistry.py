@@ -0,0 +1,57 @@
+""" Keeps track of textures by their content, so identical ones are shared """
+import hashlib
+
+import numpy as np
+
+
+class TextureRegistry(object):
+    """Gives every distinct texture one id. Textures are identified by a
+    hash of their shape and pixels, so identical textures (eg. the same
+    block in several levels) are only uploaded once.
+
+    :param upload: Makes a texture (eg. an OpenGL texture) from a C
+        contiguous array and returns its id.
+    :type upload: function
+    """
+
+    def __init__(self, upload):
+        self.upload = upload
+        self.ids = {}
+        self.requested_bytes = 0
+        self.unique_bytes = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def digest(texture):
+        """The hash of the texture's shape and pixels.
+
+        :param texture: A C contiguous texture.
+        :type texture: np.ndarray
+
+        :rtype: str
+        """
+        content = hashlib.sha1(str(texture.shape).encode('utf-8'))
+        content.update(memoryview(texture).cast('B'))
+        return content.hexdigest()
+
+    def register(self, texture):
+        """Returns the id of the texture, it is only uploaded if no
+        identical texture was registered before.
+
+        :param texture: The texture that is needed.
+        :type texture: np.ndarray
+        """
+        texture = np.ascontiguousarray(texture)
+        self.requested_bytes += texture.nbytes
+        key = self.digest(texture)
+        if key not in self.ids:
+            self.ids[key] = self.upload(texture)
+            self.unique_bytes += texture.nbytes
+        return self.ids[key]
+
+    @property
+    def saved_bytes(self):
+        """How many bytes were not uploaded because of identical textures."""
+        return self.requested_bytes - self.unique_bytes
@@ -1,4 +1,7 @@
 """ Contains the Zone object """
+from bisect import bisect_right
+
+import numpy as np
 
 
 class Zone(object):
@@ -31,7 +34,9 @@ class Zone(object):
                + " - type: " + str(self.zone_type)
     
     def check(self, pos):
-        """Returns True if the given position is in the zone.
+        """Returns True if the given position is in the zone. The beginning
+        of the zone is in it, but the end is not (that is the beginning of
+        the next zone).
 
         :param pos: The position in pixels.
         :type pos: int
@@ -39,4 +44,45 @@ class Zone(object):
         :rtype: bool
         """
 
-        return self.offset <= pos <= self.offset + self.length
+        return self.offset <= pos < self.offset + self.length
+
+
+class ZoneIndex(object):
+    """The zones of a Level as sorted arrays of their beginnings and ends,
+    to find the zone of a position with a binary search. Positions usually
+    stay in the same zone for many ticks, so the last zone found is
+    checked first.
+
+    :param zones: The zones of the Level one after the other.
+    :type zones: [Zone]
+    """
+
+    def __init__(self, zones):
+        self.zones = list(zones)
+        self.starts = np.array([zone.offset for zone in self.zones])
+        self.ends = self.starts + np.array([zone.length for zone in self.zones])
+        self.length = int(self.ends[-1]) if self.zones else 0
+        # Plain lists are faster to search for a single position
+        self._starts, self._ends = self.starts.tolist(), self.ends.tolist()
+        self.last = None  # The index of the last zone found
+        self.last_start, self.last_end = 0, 0
+
+    def find(self, pos):
+        """The zone that contains the position (see Zone.check), or None
+        if it is outside of the Level.
+
+        :param pos: The position in pixels.
+        :type pos: int
+
+        :rtype: Zone or None
+        """
+        if self.last is not None and self.last_start <= pos < self.last_end:
+            return self.zones[self.last]
+
+        # The first zone that ends after the position
+        index = bisect_right(self._ends, pos)
+        if index == len(self.zones) or pos < self._starts[index]:
+            return None
+        self.last = index
+        self.last_start, self.last_end = self._starts[index], self._ends[index]
+        return self.zones[index]
@@ -0,0 +1,76 @@
+// Python extension wrapping the noise functions of perlin.c
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+float perlin2d(float x, float y, float freq, int depth);
+void perlin2d_grid(float *out, float xoff, float yoff, int width, int height, float freq, int depth);
+
+static PyObject *py_perlin2d(PyObject *self, PyObject *args)
+{
+    float x, y, freq;
+    int depth;
+
+    if (!PyArg_ParseTuple(args, "fffi", &x, &y, &freq, &depth))
+        return NULL;
+
+    return PyFloat_FromDouble(perlin2d(x, y, freq, depth));
+}
+
+static PyObject *py_perlin2d_grid(PyObject *self, PyObject *args)
+{
+    float xoff, yoff, freq;
+    int width, height, depth;
+    PyObject *target;
+    Py_buffer out;
+
+    if (!PyArg_ParseTuple(args, "ffiifiO", &xoff, &yoff, &width, &height, &freq, &depth, &target))
+        return NULL;
+
+    if (width < 0 || height < 0)
+    {
+        PyErr_SetString(PyExc_ValueError, "width and height can't be negative");
+        return NULL;
+    }
+
+    if (PyObject_GetBuffer(target, &out, PyBUF_WRITABLE | PyBUF_FORMAT | PyBUF_C_CONTIGUOUS) < 0)
+        return NULL;
+
+    if (out.itemsize != sizeof(float) || strcmp(out.format, "f") != 0)
+    {
+        PyErr_SetString(PyExc_TypeError, "out must be a float32 buffer");
+        PyBuffer_Release(&out);
+        return NULL;
+    }
+
+    if (out.len != (Py_ssize_t)width * height * (Py_ssize_t)sizeof(float))
+    {
+        PyErr_SetString(PyExc_ValueError, "out must have exactly width*height elements");
+        PyBuffer_Release(&out);
+        return NULL;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    perlin2d_grid((float *)out.buf, xoff, yoff, width, height, freq, depth);
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&out);
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef perlin_methods[] = {
+    {"perlin2d", py_perlin2d, METH_VARARGS,
+     "perlin2d(x, y, freq, depth)\n\nNoise value at a single point."},
+    {"perlin2d_grid", py_perlin2d_grid, METH_VARARGS,
+     "perlin2d_grid(xoff, yoff, width, height, freq, depth, out)\n\n"
+     "Fills the C contiguous float32 buffer out with height rows of width\n"
+     "values, where out[row, col] = perlin2d(xoff+col, yoff+row, freq, depth).\n"
+     "The GIL is released while the grid is computed."},
+    {NULL, NULL, 0, NULL}};
+
+static struct PyModuleDef perlin_module = {
+    PyModuleDef_HEAD_INIT, "_perlin", "Compiled Perlin noise for LinMaze.", -1, perlin_methods};
+
+PyMODINIT_FUNC PyInit__perlin(void)
+{
+    return PyModule_Create(&perlin_module);
+}
@@ -73,6 +73,26 @@ float perlin2d(float x, float y, float freq, int depth)
     return fin / div;
 }
 
+void perlin2d_grid(float *out, float xoff, float yoff, int width, int height, float freq, int depth)
+{
+    int row;
+
+    // Rows are independent, so they are shared between threads if compiled with OpenMP
+#ifdef _OPENMP
+#pragma omp parallel for schedule(static)
+#endif
+    for (row = 0; row < height; row++)
+    {
+        float *line = out + (long)row * width;
+        int col;
+        for (col = 0; col < width; col++)
+        {
+            line[col] = perlin2d(xoff + col, yoff + row, freq, depth);
+        }
+    }
+}
+
+#ifndef PERLIN_NO_MAIN
 int main(int argc, char *argv[])
 {
     int x, y;
@@ -81,4 +101,5 @@ int main(int argc, char *argv[])
     result = perlin2d(1, 1, 0.1, 4);
     printf("C Result: %.6f ", result);
     return 0;
-}
\ No newline at end of file
+}
+#endif
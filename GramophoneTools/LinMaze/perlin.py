@@ -6,15 +6,51 @@ import random
 
 import numpy as np
 
+try:
+    from GramophoneTools.LinMaze import _perlin
+except ImportError:
+    # The extension is optional, it is only built where a compiler is available
+    _perlin = None
+
 DIR = os.path.dirname(__file__)
-if platform.architecture()[0] == '64bit':
-    perlin_lib = ctypes.CDLL(DIR+'/perlin64.dll')
-if platform.architecture()[0] == '32bit':
-    perlin_lib = ctypes.CDLL(DIR+'/perlin32.dll')
+try:
+    if platform.architecture()[0] == '64bit':
+        perlin_lib = ctypes.CDLL(DIR+'/perlin64.dll')
+    if platform.architecture()[0] == '32bit':
+        perlin_lib = ctypes.CDLL(DIR+'/perlin32.dll')
+except OSError:
+    # The prebuilt libraries are Windows only
+    perlin_lib = None
+
+# Same permutation table and seed as in perlin.c
+SEED = 2
+SHADE_BLOCK = 256  # Columns of an image converted to float64 at a time
+HASH = np.array([
+    208, 34, 231, 213, 32, 248, 233, 56, 161, 78, 24, 140, 71, 48, 140, 254,
+    245, 255, 247, 247, 40, 185, 248, 251, 245, 28, 124, 204, 204, 76, 36, 1,
+    107, 28, 234, 163, 202, 224, 245, 128, 167, 204, 9, 92, 217, 54, 239, 174,
+    173, 102, 193, 189, 190, 121, 100, 108, 167, 44, 43, 77, 180, 204, 8, 81,
+    70, 223, 11, 38, 24, 254, 210, 210, 177, 32, 81, 195, 243, 125, 8, 169,
+    112, 32, 97, 53, 195, 13, 203, 9, 47, 104, 125, 117, 114, 124, 165, 203,
+    181, 235, 193, 206, 70, 180, 174, 0, 167, 181, 41, 164, 30, 116, 127, 198,
+    245, 146, 87, 224, 149, 206, 57, 4, 192, 210, 65, 210, 129, 240, 178, 105,
+    228, 108, 245, 148, 140, 40, 35, 195, 38, 58, 65, 207, 215, 253, 65, 85,
+    208, 76, 62, 3, 237, 55, 89, 232, 50, 217, 64, 244, 157, 199, 121, 252, 90,
+    17, 212, 203, 149, 152, 140, 187, 234, 177, 73, 174, 193, 100, 192, 143,
+    97, 53, 145, 135, 19, 103, 13, 90, 135, 151, 199, 91, 239, 247, 33, 39,
+    145, 101, 120, 99, 3, 186, 86, 99, 41, 237, 203, 111, 79, 220, 135, 158,
+    42, 30, 154, 120, 67, 87, 167, 135, 176, 183, 191, 253, 115, 184, 21, 233,
+    58, 129, 233, 142, 39, 128, 211, 118, 137, 139, 255, 114, 20, 218, 113,
+    154, 27, 127, 246, 250, 1, 8, 198, 250, 209, 92, 222, 173, 21, 88, 102,
+    219], dtype=np.intp)
 
 
 def perlin2d(x, y, freq, depth):
     """ Python wrapper for the c function in perlin.dll """
+    if _perlin is not None:
+        return _perlin.perlin2d(x, y, freq, depth)
+    if perlin_lib is None:
+        return float(perlin2d_array(x, y, freq, depth))
     c_X = ctypes.c_float(x)
     c_Y = ctypes.c_float(y)
     c_freq = ctypes.c_float(freq)
@@ -23,34 +59,139 @@ def perlin2d(x, y, freq, depth):
     return perlin_lib.perlin2d(c_X, c_Y, c_freq, c_depth)
 
 
-def cloud(width, height, seed=None):
-    img = np.zeros((height, width))
-    random.seed(seed)
-    xoff, yoff = random.randrange(1e6), random.randrange(1e6)
-    for (x, y), _ in np.ndenumerate(img):
-        img[x][y] = int(255*perlin2d(x+xoff, y+yoff, 1/70, 5))
-    return img
+def _smooth_inter(low, high, frac):
+    """ smooth_inter() of perlin.c on arrays. """
+    return low + frac * frac * (3 - 2 * frac) * (high - low)
 
 
-def marble(width, height, seed=None):
-    img = np.zeros((height, width))
+def _noise2d(x, y):
+    """ noise2d() of perlin.c on float32 arrays. """
+    x_int = x.astype(np.intp)
+    y_int = y.astype(np.intp)
+    x_frac = x - x_int.astype(np.float32)
+    y_frac = y - y_int.astype(np.float32)
+
+    # noise2(): the coordinates are never negative, so & 255 is % 256
+    row_0 = HASH[(y_int + SEED) & 255]
+    row_1 = HASH[(y_int + 1 + SEED) & 255]
+    s = HASH[(row_0 + x_int) & 255].astype(np.float32)
+    t = HASH[(row_0 + x_int + 1) & 255].astype(np.float32)
+    u = HASH[(row_1 + x_int) & 255].astype(np.float32)
+    v = HASH[(row_1 + x_int + 1) & 255].astype(np.float32)
+
+    low = _smooth_inter(s, t, x_frac)
+    high = _smooth_inter(u, v, x_frac)
+    return _smooth_inter(low, high, y_frac)
+
+
+def perlin2d_array(x, y, freq, depth):
+    """ Vectorized version of perlin2d that works on whole arrays at once.
+    x and y can be any arrays that broadcast together, the result has their
+    broadcast shape. Uses the same float32 arithmetic as perlin.c.
+
+    :param x: The x coordinates.
+    :type x: np.array or float
+
+    :param y: The y coordinates.
+    :type y: np.array or float
+
+    :param freq: The frequency of the noise.
+    :type freq: float
+
+    :param depth: The number of octaves.
+    :type depth: int
+
+    :rtype: np.array of float32
+    """
+    freq = np.float32(freq)
+    xa = np.asarray(x, dtype=np.float32) * freq
+    ya = np.asarray(y, dtype=np.float32) * freq
+    amp = np.float32(1)
+    fin = np.float32(0)
+    div = np.float32(0)
+
+    for _ in range(depth):
+        div += 256 * amp
+        fin = fin + _noise2d(xa, ya) * amp
+        amp /= 2
+        xa = xa * 2
+        ya = ya * 2
+
+    return fin / div
+
+
+def perlin2d_grid(xoff, yoff, width, height, freq, depth, out=None):
+    """ Noise values for a width×height grid of points in one call, ie.
+    out[row, col] = perlin2d(xoff+col, yoff+row, freq, depth).
+    Uses the compiled extension (multithreaded, without the GIL) if it is
+    available and NumPy otherwise.
+
+    :param out: A C contiguous float32 array with shape (height, width) the
+        result is written into. A new one is made if None. None by default.
+    :type out: np.array or None
+
+    :rtype: np.array of float32 with shape (height, width)
+    """
+    if out is None:
+        out = np.empty((height, width), dtype=np.float32)
+    if _perlin is not None:
+        _perlin.perlin2d_grid(xoff, yoff, width, height, freq, depth, out)
+    else:
+        x = np.arange(xoff, xoff+width, dtype=np.float32)[np.newaxis, :]
+        y = np.arange(yoff, yoff+height, dtype=np.float32)[:, np.newaxis]
+        out[...] = perlin2d_array(x, y, freq, depth)
+    return out
+
+
+def noise_grid(width, height, xoff, yoff, freq, depth):
+    """ Perlin noise for a whole image. Like in the per pixel loops
+    the x coordinate runs along the rows and y along the columns, ie.
+    grid[x, y] = perlin2d(x+xoff, y+yoff, freq, depth)
+
+    :rtype: np.array of float32 with shape (height, width)
+    """
+    return perlin2d_grid(xoff, yoff, height, width, freq, depth).T
+
+
+def _shade(width, height, seed, freq, depth, shader):
+    """ Perlin noise for a whole image turned into uint8 pixel values by
+    shader. The noise is shaded in blocks, so only a block at a time is
+    converted to float64 (which keeps the values the same as they were in
+    the per pixel loops).
+
+    :param shader: Gets a block of noise values and the row indices of its
+        pixels and returns the pixel values.
+    :type shader: function
+
+    :rtype: np.array of uint8 with shape (height, width)
+    """
     random.seed(seed)
     xoff, yoff = random.randrange(1e6), random.randrange(1e6)
-    for (x, y), _ in np.ndenumerate(img):
-        noise = perlin2d(x+xoff, y+yoff, 1/70, 5)
-        img[x][y] = int(255*(math.sin(16*x/width + 4*(noise - 0.5)) + 1) * 0.5)
+    # noise[y, x] is the pixel in row x and column y, see noise_grid
+    noise = perlin2d_grid(xoff, yoff, height, width, freq, depth)
+    img = np.empty(noise.shape, dtype=np.uint8)
+    rows = np.arange(height)[np.newaxis, :]
+    for start in range(0, width, SHADE_BLOCK):
+        block = slice(start, start+SHADE_BLOCK)
+        img[block] = shader(noise[block].astype(np.float64), rows)
+    return img.T
+
 
-    return img
+def cloud(width, height, seed=None):
+    return _shade(width, height, seed, 1/70, 5,
+                  lambda noise, x: np.trunc(255*noise))
+
+
+def marble(width, height, seed=None):
+    return _shade(width, height, seed, 1/70, 5,
+                  lambda noise, x: np.trunc(255*(np.sin(16*x/width + 4*(noise - 0.5)) + 1) * 0.5))
 
 
 def wood(width, height, seed=None):
-    img = np.zeros((height, width))
-    random.seed(seed)
-    xoff, yoff = random.randrange(1e6), random.randrange(1e6)
-    for (x, y), _ in np.ndenumerate(img):
-        noise = perlin2d(x+xoff, y+yoff, 1/150, 2) * 13
-        img[x][y] = 255*(noise-int(noise))
-    return img
+    def shader(noise, _):
+        noise *= 13
+        return np.round(255*(noise-np.trunc(noise)))
+    return _shade(width, height, seed, 1/150, 2, shader)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,102 @@
+""" Measures the CPU time of drawing a frame of VR units with the
+immediate mode quads of the old on_draw (every unit, every frame) and with
+the vertex buffer Renderer (only the units on the screen), as the number
+of blocks grows. Needs an OpenGL window, use a software renderer (eg.
+xvfb-run) on a machine without a display. """
+
+import ctypes
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pyglet
+from pyglet.gl import *
+
+from GramophoneTools.LinMaze.LinMaze import Session
+from GramophoneTools.LinMaze.Renderer import Renderer
+
+WIDTH, HEIGHT = 640, 64
+BLOCK_LENGTH = 400
+FRAMES = 300
+
+
+def make_session(blocks, texture_id):
+    session = Session.__new__(Session)
+    session.collection = SimpleNamespace(screen_width=WIDTH, screen_height=HEIGHT)
+    session.camera = 0
+    session.vr_units = [{"offset": i * BLOCK_LENGTH, "length": BLOCK_LENGTH,
+                         "texture_id": texture_id, "rgb": (1, 1, 1)}
+                        for i in range(blocks)]
+    session.index_vr_units()
+    return session
+
+
+def immediate_draw(session, mirrored):
+    """ The drawing of the old on_draw, one translation and quad per unit. """
+    for vru in session.vr_units:
+        position = session.camera + vru["offset"]
+        sx, sy = vru["length"], HEIGHT
+        glLoadIdentity()
+        glColor3f(*vru["rgb"])
+        glBindTexture(GL_TEXTURE_2D, vru["texture_id"])
+        if mirrored:
+            glTranslatef(-position + WIDTH - sx, 0, 0)
+        else:
+            glTranslatef(position, 0, 0)
+        glBegin(GL_QUADS)
+        glTexCoord2f(1, 0)
+        glVertex2i(sx, 0)
+        glTexCoord2f(0, 0)
+        glVertex2i(0, 0)
+        glTexCoord2f(0, 1)
+        glVertex2i(0, sy)
+        glTexCoord2f(1, 1)
+        glVertex2i(sx, sy)
+        glEnd()
+
+
+def frame_time(draw, session):
+    """ Average CPU time of drawing a frame while moving along the level. """
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        session.camera = -(frame * 37 % (len(session.vr_units) * BLOCK_LENGTH))
+        glClear(GL_COLOR_BUFFER_BIT)
+        draw(session, mirrored=False)
+        draw(session, mirrored=True)
+    glFinish()
+    return (time.perf_counter() - start) / FRAMES
+
+
+def benchmark():
+    glViewport(0, 0, WIDTH, HEIGHT)
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    glOrtho(0, WIDTH, 0, HEIGHT, -1, 1)
+    glMatrixMode(GL_MODELVIEW)
+    glEnable(GL_TEXTURE_2D)
+
+    texture = np.random.randint(256, size=(HEIGHT, BLOCK_LENGTH)).astype(np.uint8)
+    texture_id = GLuint(0)
+    glGenTextures(1, ctypes.byref(texture_id))
+    glBindTexture(GL_TEXTURE_2D, texture_id)
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+    glTexImage2D(GL_TEXTURE_2D, 0, GL_LUMINANCE, BLOCK_LENGTH, HEIGHT,
+                 0, GL_LUMINANCE, GL_UNSIGNED_BYTE, texture.ctypes.data)
+
+    print('Time of drawing a normal and a mirrored frame')
+    print('%8s %14s %14s' % ('blocks', 'immediate', 'renderer'))
+    for blocks in [10, 100, 500, 2000]:
+        session = make_session(blocks, texture_id)
+        renderer = Renderer(session)
+        old = frame_time(immediate_draw, session)
+        new = frame_time(lambda session, mirrored: renderer.draw(mirrored), session)
+        renderer.delete()
+        print('%8d %11.3f ms %11.3f ms' % (blocks, old * 1000, new * 1000))
+
+
+if __name__ == '__main__':
+    window = pyglet.window.Window(WIDTH, HEIGHT, visible=False)
+    window.switch_to()
+    benchmark()
+    window.close()
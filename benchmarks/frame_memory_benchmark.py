@@ -0,0 +1,58 @@
+""" Measures the peak memory of making the Frames of a 4K wide Level one
+after the other, with the uint8 pipeline and with the float64 frames and
+the three rounding passes of the make_texture that was used before. """
+
+import time
+import tracemalloc
+
+import numpy as np
+
+from GramophoneTools.LinMaze import Frame
+
+WIDTH, HEIGHT = 3840, 2160
+RGB = (0.8, 0.9, 1)
+
+
+def level_frames():
+    return [Frame.BinaryNoise(WIDTH, HEIGHT, 1),
+            Frame.Checkerboard(WIDTH, HEIGHT, 60),
+            Frame.Cloud(WIDTH, HEIGHT, 2),
+            Frame.Wood(WIDTH, HEIGHT, 3),
+            Frame.SineWave(WIDTH, HEIGHT, 150, 45)]
+
+
+def float64_make_texture(self):
+    """ Frame.make_texture as it was before, on a float64 frame. """
+    if self.texture is None:
+        flipped_frame = np.flip(self.frame.astype(np.float64), 0)
+        frame_r = np.round(self.rgb[0] * flipped_frame)
+        frame_g = np.round(self.rgb[1] * flipped_frame)
+        frame_b = np.round(self.rgb[2] * flipped_frame)
+        data = np.dstack((frame_r, frame_g, frame_b))
+        self.texture = data.astype(np.uint8)
+
+
+def measure(frame):
+    frame.rgb = RGB
+    tracemalloc.start()
+    start = time.perf_counter()
+    frame.make()
+    runtime = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return runtime, peak
+
+
+if __name__ == '__main__':
+    print('Frames of', str(WIDTH) + '×' + str(HEIGHT),
+          '(a texture is %.1f MB)' % (WIDTH * HEIGHT * 3 / 1e6))
+    print('%-16s %22s %22s' % ('', 'uint8', 'float64 make_texture'))
+    uint8_make_texture = Frame.Frame.make_texture
+    for uint8_frame, float64_frame in zip(level_frames(), level_frames()):
+        new_time, new_peak = measure(uint8_frame)
+        Frame.Frame.make_texture = float64_make_texture
+        old_time, old_peak = measure(float64_frame)
+        Frame.Frame.make_texture = uint8_make_texture
+        print('%-16s %6.2f sec %8.1f MB %6.2f sec %8.1f MB' % (
+            uint8_frame.display_name, new_time, new_peak / 1e6,
+            old_time, old_peak / 1e6))
@@ -0,0 +1,53 @@
+""" Measures the wall time and the peak memory of rendering a 20 block
+Level with multi_make, with the textures passed back from the workers by
+pickling or in shared memory. Each mode runs in a new process, so their
+peak memory can be compared. """
+
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from GramophoneTools.LinMaze import Frame
+
+BLOCKS = 20
+WIDTH, HEIGHT = 1380, 1080
+
+
+def level_frames():
+    frames = []
+    for i in range(BLOCKS):
+        if i % 2:
+            frames.append(Frame.SineWave(WIDTH, HEIGHT, 150, 45))
+        else:
+            frames.append(Frame.Cloud(WIDTH, HEIGHT, i))
+    return frames
+
+
+def run(mode):
+    Frame.set_texture_cache(None)
+    start = time.perf_counter()
+    frames = Frame.multi_make(level_frames(),
+                              use_shared_memory=(mode == 'shared'))
+    runtime = time.perf_counter() - start
+    checksum = sum(int(frame.texture.sum()) for frame in frames)
+
+    peak = 'n/a'
+    if resource is not None:
+        peak = '%.1f MB' % (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+    print('%-7s %7.2f sec   peak memory: %s   checksum: %d' %
+          (mode, runtime, peak, checksum))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(sys.argv[1])
+    else:
+        print(BLOCKS, 'blocks of', str(WIDTH) + '×' + str(HEIGHT))
+        for mode in ['pickle', 'shared']:
+            subprocess.run([sys.executable, __file__, mode],
+                           stderr=subprocess.DEVNULL)
@@ -0,0 +1,42 @@
+""" Compares the whole grid NumPy Perlin noise with the per pixel
+perlin2d calls that were used for rendering noise Frames before. """
+
+import random
+import time
+
+import numpy as np
+
+from GramophoneTools.LinMaze import perlin
+
+
+def per_pixel_cloud(width, height, seed=None):
+    """ The cloud generator as it was before vectorization. """
+    img = np.zeros((height, width))
+    random.seed(seed)
+    xoff, yoff = random.randrange(1e6), random.randrange(1e6)
+    for (x, y), _ in np.ndenumerate(img):
+        img[x][y] = int(255*perlin.perlin2d(x+xoff, y+yoff, 1/70, 5))
+    return img
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    WIDTH, HEIGHT = 1280, 1080
+
+    if perlin.perlin_lib is None:
+        print('The perlin library could not be loaded, '
+              'the per pixel path falls back to NumPy scalars.')
+
+    new, new_time = timed(perlin.cloud, WIDTH, HEIGHT, 42)
+    old, old_time = timed(per_pixel_cloud, WIDTH, HEIGHT, 42)
+
+    print('Cloud %d×%d' % (WIDTH, HEIGHT))
+    print('  per pixel: %8.3f sec' % old_time)
+    print('  grid:      %8.3f sec' % new_time)
+    print('  speedup:   %8.1f×' % (old_time / new_time))
+    print('  max difference: %g' % np.abs(new - old).max())
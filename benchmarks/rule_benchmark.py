@@ -0,0 +1,75 @@
+""" Measures the CPU time of checking the Rules of a Level in a tick, by
+checking every rule with type dispatch (like check_rules did before
+RuleTable) and with a RuleTable, as the number of rules grows. Zone rules
+have long delays and velocities stay under the thresholds, so nothing is
+triggered and only the overhead is measured. """
+
+import time
+
+from GramophoneTools.LinMaze import Rule
+from GramophoneTools.LinMaze.Level import _Level
+from GramophoneTools.LinMaze.Tools.Scheduler import Scheduler
+
+TICKS = 2000
+ZONE_TYPES = 20
+TICKS_PER_ZONE = 60  # A second in a zone at 60 ticks per second
+
+
+def make_level(rules_per_kind):
+    level = _Level('bench', (100, 10), 0, transition_width=0)
+    level.add_event('print', 'print', 'triggered')
+    for num in range(rules_per_kind):
+        level.add_rule('zone', 'print', 'zone' + str(num % ZONE_TYPES), 1000)
+        level.add_rule('velocity', 'print', 'above', 1000, 0)
+        level.add_rule('smooth_velocity', 'print', 5, 'above', 1000, 0)
+        level.add_rule('input', 'print', num % 2 + 1, 'rise')
+        level.add_rule('keypress', 'print', 'a')
+    return level
+
+
+def attach_scheduler(rules):
+    """ Waits for the delays of rules that are not in a RuleTable. """
+    scheduler = Scheduler()
+    for rule in rules:
+        if isinstance(rule, Rule.DelayedRule):
+            rule.scheduler = scheduler
+    return scheduler
+
+
+def linear_check(rules, scheduler, zone_type, vel, in_1, in_2):
+    """ The old check_rules: every rule of the level, every tick. """
+    for rule in rules:
+        if type(rule) is Rule.ZoneRule:
+            rule.check(zone_type)
+        if type(rule) in [Rule.SpeedRule, Rule.VelocityRule, Rule.SmoothVelocityRule]:
+            rule.check(vel)
+        if type(rule) is Rule.InputRule:
+            rule.check(1, in_1)
+            rule.check(2, in_2)
+    scheduler.run()
+
+
+def tick_time(check):
+    """ Average CPU time of checking the rules in a tick. """
+    start = time.perf_counter()
+    for tick in range(TICKS):
+        zone_type = 'zone' + str(tick // TICKS_PER_ZONE % ZONE_TYPES)
+        check(zone_type, tick % 7, 0, 0)
+    return (time.perf_counter() - start) / TICKS
+
+
+def benchmark():
+    print('Time of checking the rules in a tick')
+    print('%8s %14s %14s' % ('rules', 'every rule', 'RuleTable'))
+    for rules_per_kind in [4, 20, 40, 100]:
+        level = make_level(rules_per_kind)
+        scheduler = attach_scheduler(level.rules)
+        old = tick_time(lambda *signals: linear_check(level.rules, scheduler, *signals))
+        level = make_level(rules_per_kind)
+        new = tick_time(Rule.RuleTable(level.rules).check)
+        print('%8d %11.1f us %11.1f us' %
+              (len(level.rules), old * 1e6, new * 1e6))
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -1,13 +1,31 @@
 # Always prefer setuptools over distutils
 import os
+import sys
 
 import GramophoneTools
-from setuptools import setup
+from setuptools import setup, Extension
 
 readme = open('README.md', 'r')
 README_TEXT = readme.read()
 readme.close()
 
+# Row parallel noise rendering in the perlin extension
+if sys.platform == 'win32':
+    OPENMP_COMPILE, OPENMP_LINK = ['/openmp'], []
+elif sys.platform.startswith('linux'):
+    OPENMP_COMPILE, OPENMP_LINK = ['-fopenmp'], ['-fopenmp']
+else:
+    OPENMP_COMPILE, OPENMP_LINK = [], []
+
+PERLIN_EXTENSION = Extension(
+    'GramophoneTools.LinMaze._perlin',
+    sources=['GramophoneTools/LinMaze/_perlin.c',
+             'GramophoneTools/LinMaze/perlin.c'],
+    define_macros=[('PERLIN_NO_MAIN', None)],
+    extra_compile_args=OPENMP_COMPILE,
+    extra_link_args=OPENMP_LINK,
+    optional=True)  # the prebuilt dlls are used if it can't be compiled
+
 setup(
     name='GramophoneTools',
     version=GramophoneTools.__version__,
@@ -23,6 +41,7 @@ setup(
         'Intended Audience :: Science/Research',
         'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',
         'Operating System :: Microsoft :: Windows :: Windows 10',
+        'Operating System :: POSIX :: Linux',
         'Programming Language :: Python :: 3.6'],
     license='GNU GPLv3',
     keywords='femtonics gramophone',
@@ -35,6 +54,7 @@ setup(
               'GramophoneTools.LinMaze.Tools', 'GramophoneTools.Recorder', 'GramophoneTools.examples', 
               'GramophoneTools.docs', 'GramophoneTools.res'],
     py_modules=['GramophoneTools.shortcuts'],
+    ext_modules=[PERLIN_EXTENSION],
     package_dir={'GramophoneTools.examples': 'examples',
                  'GramophoneTools.docs': 'docs/build/html',
                  'GramophoneTools.res': 'res'},
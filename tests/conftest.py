@@ -0,0 +1,15 @@
+""" Fixtures shared by all the tests """
+import pytest
+
+from GramophoneTools.LinMaze import Frame
+
+
+@pytest.fixture(autouse=True)
+def no_texture_cache():
+    """ Frames are rendered every time, the textures cached in the home
+    directory of the user are neither loaded nor added to. Tests of the
+    cache set a cache of their own. """
+    previous = Frame.texture_cache
+    Frame.set_texture_cache(None)
+    yield
+    Frame.set_texture_cache(previous)
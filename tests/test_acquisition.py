@@ -0,0 +1,73 @@
+""" Test functions for reading a device in the background """
+import time
+
+from GramophoneTools.Comms import Acquisition, GramophoneError
+
+
+def counter():
+    """ A read function that returns how many times it was called. """
+    count = [0]
+
+    def read():
+        count[0] += 1
+        return {'ENCPOS': count[0]}
+    return read
+
+
+def test_latest_and_history():
+    acquisition = Acquisition(counter(), rate=200, history=10)
+    acquisition.start()
+    first = acquisition.wait(timeout=1)
+    time.sleep(0.2)
+    acquisition.stop()
+
+    assert first.values == {'ENCPOS': 1}
+    # Roughly 40 reads at 200 Hz, only the last 10 are kept
+    assert 10 <= acquisition.latest.values['ENCPOS'] <= 45
+    assert len(acquisition.history) == 10
+    assert acquisition.history[-1] is acquisition.latest
+    times = [sample.time for sample in acquisition.history]
+    assert times == sorted(times)
+
+    # Nothing is read after stopping
+    latest = acquisition.latest
+    time.sleep(0.05)
+    assert acquisition.latest is latest
+    assert acquisition.recent(0) == []
+
+
+def test_errors():
+    read = counter()
+
+    def unreliable():
+        values = read()
+        if values['ENCPOS'] % 2:
+            raise GramophoneError('timeout')
+        return values
+
+    acquisition = Acquisition(unreliable, rate=500)
+    acquisition.start()
+    acquisition.wait(timeout=1)
+    time.sleep(0.05)
+    acquisition.stop()
+    assert acquisition.errors > 0
+    assert all(sample.values['ENCPOS'] % 2 == 0 for sample in acquisition.history)
+
+
+def test_wait_timeout():
+    acquisition = Acquisition(lambda: {}, rate=10)
+    assert acquisition.wait(timeout=0.01) is None
+
+
+def test_callback_error():
+    def callback(sample):
+        if sample.values['ENCPOS'] == 3:
+            raise ValueError('broken rule')
+
+    acquisition = Acquisition(counter(), rate=500, callback=callback)
+    acquisition.start()
+    time.sleep(0.05)
+    assert not acquisition.thread.is_alive()
+    acquisition.stop()
+    assert isinstance(acquisition.error, ValueError)
+    assert acquisition.latest.values['ENCPOS'] == 3
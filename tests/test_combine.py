@@ -0,0 +1,64 @@
+""" Test functions for combining Frames into one """
+import numpy as np
+
+from GramophoneTools.LinMaze import Frame
+
+
+def made_frames():
+    frames = [Frame.Checkerboard(30, 20, 4), Frame.SineWave(25, 20, 10, 30),
+              Frame.Checkerboard(10, 20, 3)]
+    for frame in frames:
+        frame.make()
+    return frames
+
+
+def test_combine():
+    frames = made_frames()
+    combined = Frame.combine(frames)
+    expected = np.concatenate([frame.texture for frame in frames], axis=1)
+    np.testing.assert_array_equal(combined.texture, expected)
+    assert (combined.width, combined.height) == (65, 20)
+
+
+def test_combine_view():
+    frames = made_frames()
+    textures = [frame.texture.copy() for frame in frames]
+    combined = Frame.combine(frames, view=True)
+
+    for frame, texture in zip(frames, textures):
+        assert np.shares_memory(frame.texture, combined.texture)
+        np.testing.assert_array_equal(frame.texture, texture)
+
+
+def test_combine_width():
+    frames = made_frames()
+    expected = np.concatenate([frame.texture for frame in frames], axis=1)
+    for width in (20, 30, 40, 100):
+        combined = Frame.combine(frames, width=width)
+        np.testing.assert_array_equal(combined.texture, expected[:, :width])
+        assert combined.texture.flags.c_contiguous
+
+
+def test_combine_tints():
+    frames = made_frames()
+    assert Frame.combine(frames).texture.ndim == 2
+
+    frames[1].rgb = (1, 0, 0.5)
+    combined = Frame.combine(frames)
+    assert combined.texture.shape == (20, 65, 3)
+    assert combined.rgb == (1, 1, 1)
+    np.testing.assert_array_equal(combined.texture[:, 30:55],
+                                  Frame.tint(frames[1].texture, (1, 0, 0.5)))
+
+
+def test_transitions_between_tints():
+    frames = made_frames()
+    expected = [Frame.tint(frame.texture, (1, 1, 1)) for frame in frames]
+    frames[2].rgb = (0.5, 1, 1)
+    expected[2] = Frame.tint(frames[2].texture, (0.5, 1, 1))
+
+    frames = Frame.frame_transitions(frames, 4)
+    for frame, texture in zip(frames, expected):
+        assert frame.texture.ndim == 3 and frame.rgb == (1, 1, 1)
+        # Only the edges are blended
+        np.testing.assert_array_equal(frame.texture[:, 4:-4], texture[:, 6:-6])
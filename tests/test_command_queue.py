@@ -0,0 +1,87 @@
+""" Test functions for sending commands to a device in the background """
+import threading
+
+from GramophoneTools.Comms import CommandQueue, GramophoneError
+
+
+class Device(object):
+    """ Records the outputs written, each write waiting for a go. """
+
+    def __init__(self):
+        self.written = []
+        self.go = threading.Event()
+        self.go.set()
+
+    def write_output(self, output, value):
+        self.go.wait()
+        if output == 4:
+            raise GramophoneError('timeout')
+        self.written.append((output, value))
+
+
+def outputs(*states):
+    return {'DO-' + str(num + 1): state for num, state in enumerate(states)}
+
+
+def test_coalesce_and_cache():
+    device = Device()
+    commands = CommandQueue(device)
+    commands.start()
+    commands.write_output(1, 1)
+    commands.write_output(1, 1)
+    commands.write_output(2, 0)
+    commands.write_output(1, 0)
+    assert commands.outputs[1] == 0
+    commands.stop()
+
+    assert device.written == [(1, 1), (1, 0)]
+    assert commands.coalesced == 2 and commands.sent == 2
+
+
+def test_sync():
+    device = Device()
+    commands = CommandQueue(device)
+    commands.start()
+
+    # Not while a write is waiting
+    device.go.clear()
+    sent = commands.sent
+    commands.write_output(3, 1)
+    commands.sync(outputs(0, 0, 0, 0), sent)
+    assert commands.outputs[3] == 1
+
+    # Not from a read that started before the write was sent
+    device.go.set()
+    commands.stop()
+    commands.sync(outputs(0, 0, 0, 0), sent)
+    assert commands.outputs[3] == 1
+
+    commands.sync(outputs(0, 1, 1, 0), commands.sent)
+    assert commands.outputs == {1: 0, 2: 1, 3: 1, 4: 0}
+
+
+def test_errors():
+    commands = CommandQueue(Device())
+    commands.start()
+    commands.write_output(4, 1)
+    commands.stop()
+    assert commands.errors == 1 and commands.sent == 1
+
+
+def test_bursts():
+    device = Device()
+    device.bursts = []
+    device.start_burst = lambda *args: device.bursts.append(('start',) + args)
+    device.stop_burst = lambda *args: device.bursts.append(('stop',) + args)
+    commands = CommandQueue(device)
+    commands.start()
+    commands.start_burst(2, 0.5, 1)
+    commands.start_burst(2, 0.5, 1)
+    assert commands.bursting[2]
+    commands.stop_burst(2)
+    commands.stop_burst(3)
+    assert not commands.bursting[2]
+    commands.stop()
+
+    assert device.bursts == [('start', 2, 0.5, 1), ('stop', 2)]
+    assert commands.coalesced == 2 and commands.sent == 2
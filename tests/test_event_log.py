@@ -0,0 +1,69 @@
+""" Test functions for logging the events of a Session in the background """
+import h5py
+
+from GramophoneTools.LinMaze.EventLog import EVENT_DTYPE, EventLog, LogEntry
+from GramophoneTools.LinMaze.Level import LevelCollection
+from GramophoneTools.LinMaze.LinMaze import Session
+from GramophoneTools.LinMaze.Tools.Stopwatch import Stopwatch
+
+
+def entry(num, kind='event'):
+    return LogEntry(num / 10, num * 1000, kind, 'level', num, 'reward',
+                    100.5 + num, 2, 'entry ' + str(num))
+
+
+def test_events_table(tmp_path):
+    with h5py.File(str(tmp_path / 'log.vrl'), 'w') as vrl:
+        dataset = vrl.create_dataset('events', (0,), maxshape=(None,),
+                                     dtype=EVENT_DTYPE)
+        log = EventLog(dataset)
+        log.start()
+        for num in range(5):
+            log.add(entry(num))
+        log.stop()
+
+        assert dataset.shape == (5,)
+        assert dataset['g_time'][-1] == 4000
+        assert dataset['position'][0] == 100.5
+        assert dataset[2]['message'].decode() == 'entry 2'
+
+
+def test_echo_rate(capsys):
+    log = EventLog(echo_rate=3)
+    log.start()
+    for num in range(10):
+        log.add(entry(num))
+    log.stop()
+    printed = capsys.readouterr().out.splitlines()
+    assert printed == ['entry 0', 'entry 1', 'entry 2',
+                       '... 7 more log entries not shown']
+
+
+def test_rule_trigger_entries():
+    collection = LevelCollection('events', 50, (100, 10))
+    collection.level_list = []
+    level = collection.create_level('a', transition_width=0)
+    level.add_block('checkerboard', length=300, zone_type='reward')
+    level.add_event('hello', 'print', 'Hello')
+    level.add_rule('zone', 'hello', 'reward', 0)
+    collection.active_level = level
+
+    session = Session.__new__(Session)
+    session.collection = collection
+    session.current_zone = level.zones[0]
+    session.virtual_relative_position = 120
+    session.last_read = {'TIME': 5000}
+    session.runtime = Stopwatch()
+    session.event_log = EventLog()
+    level.events['hello'].set_session(session)
+    level.events['hello'].name = 'hello'
+    level.rules[0].rule_id = 0
+    session.make_rule_tables()
+    session.rule_tables[level].check('reward', 0, 0, 0)
+
+    rule_entry = session.event_log.entries.get()
+    event_entry = session.event_log.entries.get()
+    assert rule_entry.kind == 'rule' and rule_entry.rule == 0
+    assert rule_entry.event == event_entry.event == 'hello'
+    assert event_entry._replace(time=0) == LogEntry(0, 5000, 'event', 'a', -1, 'hello', 120,
+                                   level.zones[0].zone_id, 'Hello [1]')
@@ -0,0 +1,92 @@
+""" Test functions for making Frames """
+import os
+import time
+
+import numpy as np
+import pytest
+
+from GramophoneTools.LinMaze import Frame
+
+
+@pytest.mark.parametrize('frame', [
+    Frame.BinaryNoise(70, 150, 1), Frame.GreyNoise(70, 150, None),
+    Frame.Checkerboard(70, 150, 9), Frame.Cloud(70, 150, 2),
+    Frame.Marble(70, 150, 3), Frame.Wood(70, 150, 4),
+    Frame.SineWave(70, 150, 20, 30), Frame.SquareWave(70, 150, 20, 30)])
+def test_texture(frame):
+    frame.make()
+    assert frame.texture.dtype == np.uint8
+    assert frame.texture.shape == frame.texture_shape
+    assert frame.frame is None
+
+
+def test_random_pixels_same_as_randint():
+    np.random.seed(7)
+    expected = 255 * np.random.randint(2, size=(150, 70))
+    frame = Frame.BinaryNoise(70, 150, 7)
+    frame.make()
+    np.testing.assert_array_equal(frame.texture[::-1], expected)
+
+
+def test_checkerboard():
+    frame = Frame.Checkerboard(10, 6, 2)
+    frame.make()
+    expected = np.array([[255, 255, 0, 0, 255, 255, 0, 0, 255, 255],
+                         [255, 255, 0, 0, 255, 255, 0, 0, 255, 255],
+                         [0, 0, 255, 255, 0, 0, 255, 255, 0, 0]])
+    np.testing.assert_array_equal(frame.texture[::-1][:3], expected)
+
+
+def test_tint():
+    frame = Frame.Checkerboard(10, 6, 2)
+    frame.rgb = (1, 0.5, 0)
+    frame.make()
+    assert frame.texture.ndim == 2
+    tinted = Frame.tint(frame.texture, frame.rgb)
+    assert set(np.unique(tinted[..., 0])) == {0, 255}
+    assert set(np.unique(tinted[..., 1])) == {0, 128}
+    assert not tinted[..., 2].any()
+
+    frame.bake_tint()
+    np.testing.assert_array_equal(frame.texture, tinted)
+    assert frame.rgb == (1, 1, 1)
+
+
+class BrokenFrame(Frame.Checkerboard):
+    """ A Frame that fails to render. """
+
+    def make_texture(self):
+        raise ValueError('broken frame')
+
+
+class SlowFrame(Frame.Checkerboard):
+    """ A Frame that takes a while to render. """
+
+    def make_texture(self):
+        time.sleep(0.2)
+        super().make_texture()
+
+
+def shared_blocks():
+    try:
+        return {name for name in os.listdir('/dev/shm') if name.startswith('psm_')}
+    except OSError:
+        return set()
+
+
+def test_render_error():
+    before = shared_blocks()
+    frames = [BrokenFrame(10, 10, 2)] + \
+        [SlowFrame(10, 10, size) for size in range(1, 4)]
+    with pytest.raises(ValueError, match='broken frame'):
+        Frame.multi_make(frames)
+    # The other jobs ended before their blocks were removed
+    pending = Frame.render_pool()._cache  # The results still pending
+    deadline = time.monotonic() + 0.05  # The last one is removed after its callback
+    while pending and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert not pending
+    assert shared_blocks() == before
+
+    made = Frame.multi_make([Frame.Checkerboard(10, 6, 2)])
+    assert made[0].texture.shape == made[0].texture_shape
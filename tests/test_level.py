@@ -0,0 +1,43 @@
+""" Test functions for LinMaze levels """
+import numpy as np
+
+from GramophoneTools.LinMaze.Level import _Level
+
+
+def make_level():
+    level = _Level('test', (80, 20), 0, transition_width=10)
+    level.add_block('checkerboard', length=60, side_length=5)
+    level.add_block('sine', length=50, wavelength=12, angle=30)
+    return level
+
+
+def test_images_are_reused():
+    level = make_level()
+    assert level.combined_frame is level.combined_frame
+    assert level.dummy_frame is level.dummy_frame
+
+    np.testing.assert_array_equal(
+        level.dummy_frame.texture, level.combined_frame.texture[:, :80])
+
+
+def test_add_block_forgets_images():
+    level = make_level()
+    dummy, combined = level.dummy_frame, level.combined_frame
+    revision = level.revision
+
+    level.add_block('checkerboard', length=30, side_length=3)
+    assert level.revision != revision
+    assert level._combined_frame is None and level._dummy_frame is None
+    assert dummy is not level._dummy_frame
+    assert combined is not level._combined_frame
+
+
+def test_level_tint():
+    level = _Level('tinted', (80, 20), 0, transition_width=10, rgb=(1, 0.5, 0))
+    level.add_block('checkerboard', length=60, side_length=5)
+    level.add_block('sine', length=50, wavelength=12, angle=30)
+
+    assert level.combined_frame.texture.ndim == 2
+    assert level.combined_frame.rgb == (1, 0.5, 0)
+    assert level.dummy_frame.rgb == (1, 0.5, 0)
+    assert all(frame.rgb == (1, 0.5, 0) for frame in level.frames)
@@ -0,0 +1,58 @@
+""" Test functions for rendering Frames in worker processes """
+import numpy as np
+import pytest
+
+from GramophoneTools.LinMaze import Frame
+
+
+def make_frames():
+    return [Frame.Checkerboard(50, 30, 7),
+            Frame.SineWave(40, 30, 12, 45),
+            Frame.Cloud(60, 30, 3)]
+
+
+@pytest.mark.skipif(Frame.shared_memory is None,
+                    reason="shared memory needs Python 3.8")
+def test_shared_memory_same_as_pickle():
+    pickled = Frame.multi_make(make_frames(), use_shared_memory=False)
+    shared = Frame.multi_make(make_frames(), use_shared_memory=True)
+
+    for expected, frame in zip(pickled, shared):
+        assert frame.made
+        assert frame.texture.flags.writeable
+        np.testing.assert_array_equal(frame.texture, expected.texture)
+
+
+def test_pool_is_reused():
+    Frame.multi_make(make_frames())
+    pool = Frame.render_pool()
+    Frame.multi_make(make_frames())
+    assert Frame.render_pool() is pool
+
+    Frame.shutdown_render_pool()
+    assert Frame.render_pool() is not pool
+
+
+def test_worker_error_raised():
+    broken = Frame.Checkerboard(50, 30, 7)
+    broken.side_length = None
+    with pytest.raises(TypeError):
+        Frame.multi_make([Frame.Checkerboard(50, 30, 7), broken])
+
+
+def test_identical_frames_rendered_once():
+    frames = [Frame.Checkerboard(50, 30, 7), Frame.Cloud(60, 30, 3),
+              Frame.Checkerboard(50, 30, 7), Frame.Cloud(60, 30, None)]
+    frames[2].rgb = (1, 0, 0)
+    made = Frame.multi_make(frames)
+
+    assert made[2] is frames[2] and made[2].rgb == (1, 0, 0)
+    assert np.shares_memory(made[0].texture, made[2].texture)
+    assert not made[0].texture.flags.writeable
+    assert made[1].texture.flags.writeable
+
+    shared = made[0].texture
+    original = shared.copy()
+    blended = Frame.frame_transitions(made, 10)
+    np.testing.assert_array_equal(shared, original)
+    assert not np.shares_memory(blended[0].texture, blended[2].texture)
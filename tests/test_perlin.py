@@ -0,0 +1,49 @@
+""" Test functions for the Perlin noise generators """
+import numpy as np
+import pytest
+
+from GramophoneTools.LinMaze import perlin
+
+
+@pytest.mark.skipif(perlin._perlin is None and perlin.perlin_lib is None,
+                    reason="neither the extension nor the library can be loaded")
+def test_array_matches_c():
+    rng = np.random.RandomState(0)
+    x = rng.uniform(0, 1e6, 500)
+    y = rng.uniform(0, 1e6, 500)
+    for freq, depth in [(1/70, 5), (1/150, 2)]:
+        expected = [perlin.perlin2d(a, b, freq, depth) for a, b in zip(x, y)]
+        np.testing.assert_allclose(perlin.perlin2d_array(x, y, freq, depth),
+                                   expected, rtol=0, atol=1e-6)
+
+
+@pytest.mark.skipif(perlin._perlin is None,
+                    reason="the perlin extension is not built")
+def test_grid_fills_buffer():
+    out = np.zeros((30, 40), dtype=np.float32)
+    assert perlin.perlin2d_grid(1000, 2000, 40, 30, 1/70, 5, out) is out
+    x = np.arange(1000, 1040, dtype=np.float32)[np.newaxis, :]
+    y = np.arange(2000, 2030, dtype=np.float32)[:, np.newaxis]
+    np.testing.assert_allclose(out, perlin.perlin2d_array(x, y, 1/70, 5),
+                               rtol=0, atol=1e-6)
+
+    with pytest.raises(TypeError):
+        perlin.perlin2d_grid(0, 0, 40, 30, 1/70, 5, np.zeros((30, 40)))
+    with pytest.raises(ValueError):
+        perlin.perlin2d_grid(0, 0, 40, 30, 1/70, 5,
+                             np.zeros((30, 41), dtype=np.float32))
+
+
+def test_grid_orientation():
+    grid = perlin.noise_grid(7, 5, 123, 456, 1/70, 5)
+    assert grid.shape == (5, 7)
+    assert grid.dtype == np.float32
+    assert grid[3, 6] == perlin.perlin2d_array(3 + 123, 6 + 456, 1/70, 5)
+
+
+def test_noise_range():
+    for generator in [perlin.cloud, perlin.marble, perlin.wood]:
+        img = generator(64, 32, 1)
+        assert img.shape == (32, 64)
+        assert img.min() >= 0 and img.max() <= 255
+        np.testing.assert_array_equal(img, generator(64, 32, 1))
@@ -0,0 +1,208 @@
+""" Test functions for drawing VR units from a vertex buffer """
+from types import SimpleNamespace
+import ctypes
+
+import numpy as np
+import pytest
+import pyglet
+from pyglet.gl import *
+
+from GramophoneTools.LinMaze.Level import _Level
+from GramophoneTools.LinMaze.LinMaze import Session
+from GramophoneTools.LinMaze.Renderer import (Renderer, atlas_units, texture_key,
+                                              unit_vertices)
+from GramophoneTools.LinMaze.Residency import (TextureResidency, TextureUploader,
+                                               Tile, split_unit)
+
+WIDTH, HEIGHT = 120, 8
+
+
+def test_unit_vertices():
+    vertices = unit_vertices([{"offset": 0, "length": 50},
+                              {"offset": 50, "length": 30}], 20)
+    assert vertices.dtype == np.float32
+    np.testing.assert_array_equal(vertices[4:], [[80, 0, 1, 0],
+                                                 [50, 0, 0, 0],
+                                                 [50, 20, 0, 1],
+                                                 [80, 20, 1, 1]])
+
+
+@pytest.fixture
+def gl_context():
+    """A hidden window for drawing with OpenGL. Skips the test if there is
+    no display, run it with a software renderer (eg. xvfb-run) instead."""
+    try:
+        window = pyglet.window.Window(WIDTH, HEIGHT, visible=False)
+    except Exception as err:  # No display or no usable GL
+        pytest.skip('can not open an OpenGL window: ' + str(err))
+    window.switch_to()
+    yield window
+    window.close()
+
+
+def upload(texture):
+    tid = GLuint(0)
+    glGenTextures(1, ctypes.byref(tid))
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+    glBindTexture(GL_TEXTURE_2D, tid)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+    glTexImage2D(GL_TEXTURE_2D, 0, GL_LUMINANCE, texture.shape[1], texture.shape[0],
+                 0, GL_LUMINANCE, GL_UNSIGNED_BYTE, texture.ctypes.data)
+    return tid
+
+
+def draw(renderer, mirrored):
+    glClear(GL_COLOR_BUFFER_BIT)
+    renderer.draw(mirrored)
+    glFinish()
+    pixels = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    glReadPixels(0, 0, WIDTH, HEIGHT, GL_RGB, GL_UNSIGNED_BYTE, pixels.ctypes.data)
+    return pixels
+
+
+def strip_session(register, residency=None):
+    """A Session that draws a strip where every column has a different
+    brightness from three units, and the strip."""
+    glViewport(0, 0, WIDTH, HEIGHT)
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    glOrtho(0, WIDTH, 0, HEIGHT, -1, 1)
+    glMatrixMode(GL_MODELVIEW)
+    glEnable(GL_TEXTURE_2D)
+
+    strip = np.tile(np.arange(250, dtype=np.uint8), (HEIGHT, 1))
+    session = Session.__new__(Session)
+    session.collection = SimpleNamespace(
+        screen_width=WIDTH, screen_height=HEIGHT,
+        active_level=SimpleNamespace(offset=0, length=250))
+    session.residency = residency
+    session.prefetch_distance = 0
+    session.vr_units = []
+    for start, end in [(0, 100), (100, 170), (170, 250)]:
+        session.vr_units.append({
+            "offset": start, "length": end - start, "rgb": (1, 1, 0.5),
+            "texture_id": register(np.ascontiguousarray(strip[:, start:end]))})
+    session.index_vr_units()
+    return session, strip
+
+
+def check_draw(session, strip):
+    renderer = Renderer(session)
+    for camera in [0, -40, -130]:
+        session.camera = camera
+        expected = strip[0, -camera:-camera+WIDTH]
+        normal = draw(renderer, mirrored=False)
+        np.testing.assert_array_equal(normal[:, :, 0], np.tile(expected, (HEIGHT, 1)))
+        np.testing.assert_allclose(normal[:, :, 2], normal[:, :, 0] / 2, atol=1)
+        mirrored = draw(renderer, mirrored=True)
+        np.testing.assert_array_equal(mirrored, normal[:, ::-1])
+    renderer.delete()
+
+
+def test_draw(gl_context):
+    check_draw(*strip_session(upload))
+
+
+def test_draw_streamed(gl_context):
+    # Two of the three textures fit in the budget
+    residency = TextureResidency(budget=(70 + 80) * HEIGHT)
+    session, strip = strip_session(residency.add, residency)
+    for tile in residency.tiles:
+        assert not tile.resident
+
+    session.camera = -130  # Only the last two units are on the screen
+    draw(Renderer(session), mirrored=False)
+    assert [tile.resident for tile in residency.tiles] == [False, True, True]
+    assert residency.misses == 0
+
+    # Textures are uploaded and freed as the camera moves
+    check_draw(session, strip)
+    assert residency.resident_bytes <= residency.budget
+    residency.delete()
+    assert residency.resident_bytes == 0
+
+
+def test_upload_limit(gl_context):
+    residency = TextureResidency(upload_limit=90 * HEIGHT)
+    strip_session(residency.add, residency)  # Tiles 100, 70 and 80 wide
+    uploaded = []
+    for frame in range(3):
+        residency.request(residency.tiles)
+        uploaded.append([tile.resident for tile in residency.tiles])
+    # A tile over the limit goes alone, then as many as fit in it
+    assert uploaded == [[True, False, False], [True, True, False], [True, True, True]]
+    residency.delete()
+
+
+def mipmap_width(texture_id, level):
+    glBindTexture(GL_TEXTURE_2D, texture_id)
+    width = GLint(0)
+    glGetTexLevelParameteriv(GL_TEXTURE_2D, level, GL_TEXTURE_WIDTH, ctypes.byref(width))
+    return width.value
+
+
+def test_uploader(gl_context):
+    texture = np.zeros((HEIGHT, 64), dtype=np.uint8)
+    nearest = TextureUploader()
+    tid = nearest.upload(texture)
+    assert mipmap_width(tid, 0) == 64 and mipmap_width(tid, 1) == 0
+
+    mipmapped = TextureUploader(min_filter=GL_LINEAR_MIPMAP_LINEAR)
+    tid = mipmapped.upload(np.zeros((HEIGHT, 64, 3), dtype=np.uint8))
+    assert mipmap_width(tid, 1) == 32
+
+    assert nearest.total_bytes == HEIGHT * 64
+    assert mipmapped.total_bytes == HEIGHT * 64 * 3 * 4 // 3
+    width, height, nbytes, seconds = nearest.uploads[0]
+    assert (width, height, nbytes) == (64, HEIGHT, HEIGHT * 64) and seconds >= 0
+
+
+def test_split_unit():
+    texture = np.arange(2 * 250, dtype=np.uint8).reshape(2, 250)
+    parts = []
+    units = split_unit({"offset": 10, "length": 500}, texture,
+                       lambda part: parts.append(part) or len(parts), 100)
+    assert [part.shape[1] for part in parts] == [100, 100, 50]
+    assert [(vru["offset"], vru["length"], vru["texture_id"]) for vru in units] == \
+        [(10, 200, 1), (210, 200, 2), (410, 100, 3)]
+    np.testing.assert_array_equal(np.concatenate(parts, axis=1), texture)
+    assert split_unit({"offset": 0, "length": 50}, texture, id, 250)[0]["texture_id"] \
+        == id(texture)
+
+
+def test_texture_key():
+    # Units can hold separate GLuint objects of the same texture
+    assert texture_key(GLuint(3)) == texture_key(GLuint(3)) != texture_key(GLuint(4))
+    tile = Tile(np.zeros((2, 2), dtype=np.uint8))
+    assert texture_key(tile) == tile != Tile(tile.texture)
+
+
+def test_atlas_units():
+    level = _Level('atlas', (150, 10), 0, transition_width=20)
+    level.add_block('checkerboard', length=100, side_length=5)
+    level.add_block('sine', length=80, wavelength=12, angle=30)
+    level.render()
+
+    tiles = []
+
+    def register(texture):
+        tiles.append(texture)
+        return len(tiles)
+
+    units = atlas_units(level, register, 150, max_width=70)
+    strip_width = level.combined_frame.width
+    assert sum(tile.shape[1] for tile in tiles) == strip_width
+    assert all(tile.shape[1] <= 70 for tile in tiles)
+
+    # The units follow each other up to a screen width after the end
+    end = 0
+    for vru in units:
+        assert abs(vru["offset"] - end) < 1e-9
+        assert 0 <= vru["s"][0] < vru["s"][1] <= 1
+        end = vru["offset"] + vru["length"]
+    assert abs(end - (level.length + 150)) < 1e-9
+
+    # Every block is stretched over its zone
+    first_block = [vru for vru in units if vru["offset"] < 120]
+    assert abs(sum(vru["length"] for vru in first_block) - 120) < 1e-9
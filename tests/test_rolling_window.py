@@ -0,0 +1,42 @@
+""" Test functions for the rolling window of the velocity Rules """
+from collections import deque
+from statistics import mean
+
+import numpy as np
+import pytest
+
+from GramophoneTools.LinMaze.Tools.RollingWindow import RollingWindow
+
+
+def test_same_as_deque():
+    window, reference = RollingWindow(5), deque([], 5)
+    for value in [3, -2, 7, 0, -1, 4, 4, -9, 2]:
+        window.append(value)
+        reference.append(value)
+        assert len(window) == len(reference)
+        assert window.sum == sum(reference)
+        assert window.abs_sum == sum(abs(vel) for vel in reference)
+        assert window.mean == pytest.approx(mean(reference))
+
+
+def test_filled():
+    window = RollingWindow(4, filled=True)
+    assert len(window) == 4 and window.mean == 0
+    window.append(-8)
+    assert window.abs_sum == 8 and window.mean == -2
+
+    with pytest.raises(ValueError):
+        _ = RollingWindow(4).mean
+
+
+def test_recompute():
+    values = np.random.RandomState(0).uniform(-1000, 1000, 10000)
+    drifting = RollingWindow(7, recompute=None)
+    recomputed = RollingWindow(7, recompute=100)
+    for value in values:
+        drifting.append(value)
+        recomputed.append(value)
+    # The last append recomputed the sums from the stored values
+    assert recomputed.sum == sum(recomputed.values)
+    assert recomputed.abs_sum == sum(abs(value) for value in recomputed.values)
+    assert drifting.sum == pytest.approx(values[-7:].sum(), abs=1e-6)
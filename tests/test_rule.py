@@ -0,0 +1,130 @@
+""" Test functions for checking the Rules of a Level """
+import pyglet
+
+from GramophoneTools.LinMaze import Rule
+from GramophoneTools.LinMaze.Level import _Level
+from GramophoneTools.LinMaze.Tools.Scheduler import Scheduler
+
+
+def make_level():
+    level = _Level('rules', (100, 10), 0, transition_width=0)
+    for zone_type in ['corridor', 'reward', 'punish']:
+        level.add_event(zone_type, 'print', zone_type)
+        level.add_rule('zone', zone_type, zone_type, 0)
+    level.add_event('waiting', 'print', 'waiting')
+    level.add_rule('zone', 'waiting', 'reward', 1000)
+    level.add_event('fast', 'print', 'fast')
+    level.add_rule('velocity', 'fast', 'above', 5, 0)
+    level.add_rule('speed', 'fast', 'above', 30, 5)
+    level.add_event('lick', 'print', 'lick')
+    level.add_rule('input', 'lick', 2, 'rise')
+    level.add_event('key', 'print', 'key')
+    level.add_rule('keypress', 'key', 'r')
+    return level
+
+
+def attach_scheduler(rules):
+    """ Waits for the delays of rules that are not in a RuleTable. """
+    scheduler = Scheduler()
+    for rule in rules:
+        if isinstance(rule, Rule.DelayedRule):
+            rule.scheduler = scheduler
+    return scheduler
+
+
+def linear_check(rules, scheduler, zone_type, vel, in_1, in_2):
+    """ How every rule was checked on every frame before RuleTable. """
+    for rule in rules:
+        if type(rule) is Rule.ZoneRule:
+            rule.check(zone_type)
+        if type(rule) in [Rule.SpeedRule, Rule.VelocityRule, Rule.SmoothVelocityRule]:
+            rule.check(vel)
+        if type(rule) is Rule.InputRule:
+            rule.check(1, in_1)
+            rule.check(2, in_2)
+    scheduler.run()
+
+
+def trigger_counts(level):
+    return {name: event.trigger_count for name, event in level.events.items()}
+
+
+def test_same_triggers_as_checking_every_rule():
+    trace = [('corridor', 0, 0, 0), ('corridor', 2, 0, 1), ('reward', 8, 0, 1),
+             ('reward', 9, 0, 0), ('reward', 1, 1, 1), ('corridor', 0, 0, 0),
+             ('punish', 3, 0, 0), ('reward', 7, 0, 1), ('reward', 6, 0, 1)] * 3
+
+    reference, grouped = make_level(), make_level()
+    scheduler = attach_scheduler(reference.rules)
+    table = Rule.RuleTable(grouped.rules)
+    assert len(table) == len(grouped.rules)
+    for tick in trace:
+        linear_check(reference.rules, scheduler, *tick)
+        table.check(*tick)
+
+    assert trigger_counts(grouped) == trigger_counts(reference)
+    assert trigger_counts(grouped)['reward'] == 6
+    assert trigger_counts(grouped)['waiting'] == 0
+
+
+def test_key_lookup():
+    level = make_level()
+    table = Rule.RuleTable(level.rules)
+    table.press(pyglet.window.key.Q)
+    table.press(pyglet.window.key.R)
+    assert level.events['key'].trigger_count == 1
+
+
+def test_restart():
+    level = make_level()
+    table = Rule.RuleTable(level.rules)
+    table.check('reward', 0, 0, 0)
+    waiting = next(rule for rule in level.rules if str(rule) == 'In reward zone for 1000 sec')
+    assert waiting.active
+
+    table.restart()
+    assert not waiting.active
+    table.check('reward', 0, 0, 0)
+    assert waiting.active and level.events['reward'].trigger_count == 2
+
+
+def test_velocity_windows():
+    level = _Level('windows', (100, 10), 0, transition_width=0)
+    level.add_event('smooth', 'print', 'smooth')
+    level.add_rule('smooth_velocity', 'smooth', 3, 'above', 0, 4)
+    level.add_event('speed', 'print', 'speed')
+    level.add_rule('speed', 'speed', 'above', 8, 3)
+    smooth_rule, speed_rule = level.rules
+    attach_scheduler(level.rules)
+
+    for vel in [6, 0, -3, 3]:
+        smooth_rule.check(vel)
+        speed_rule.check(vel)
+    assert smooth_rule.vels.mean == 0
+    assert speed_rule.record.abs_sum == 6
+    assert level.events['speed'].trigger_count == 1
+
+
+def test_velocity_at_threshold():
+    level = _Level('threshold', (100, 10), 0, transition_width=0)
+    level.add_event('fast', 'print', 'fast')
+    level.add_rule('velocity', 'fast', 'above', 5, 1)
+    now = [0]
+    table = Rule.RuleTable(level.rules, Scheduler(lambda: now[0]))
+
+    def triggers(trace):
+        """ The times the rule triggered at, checked at the given times
+        with the given velocities. """
+        times = []
+        for now[0], vel in trace:
+            count = level.events['fast'].trigger_count
+            table.check('generic', vel, 0, 0)
+            if level.events['fast'].trigger_count > count:
+                times.append(now[0])
+        return times
+
+    # The delay is counted from the last time the velocity was below the
+    # threshold, a velocity at the threshold doesn't stop it
+    assert triggers([(0, 0), (0.5, 6), (0.8, 5), (1, 5), (1.5, 5), (2, 6)]) == [1, 2]
+    # but doesn't start the rule either
+    assert triggers([(3, 0), (3.5, 5), (4.2, 5), (4.5, 6), (5, 4)]) == [4.5]
@@ -0,0 +1,84 @@
+""" Test functions for waiting for deadlines with a Scheduler """
+from GramophoneTools.LinMaze import Rule
+from GramophoneTools.LinMaze.Level import _Level
+from GramophoneTools.LinMaze.Tools.Scheduler import Scheduler
+
+
+class Clock(object):
+    """ A clock that only moves when told to. """
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_order_and_cancel():
+    clock = Clock()
+    scheduler = Scheduler(clock)
+    calls = []
+    for when in [3, 1, 2]:
+        scheduler.call_at(when, lambda when=when: calls.append(when))
+    cancelled = scheduler.call_later(1.5, lambda: calls.append('cancelled'))
+    cancelled.cancel()
+
+    assert scheduler.run() == 0
+    clock.now = 2
+    assert scheduler.run() == 2 and calls == [1, 2]
+    assert scheduler.next_deadline == 3
+    clock.now = 10
+    scheduler.run()
+    assert calls == [1, 2, 3] and scheduler.next_deadline is None
+
+
+def test_rescheduling_waits_for_next_run():
+    scheduler = Scheduler(Clock())
+    calls = []
+
+    def again():
+        calls.append(len(calls))
+        scheduler.call_later(0, again)
+
+    scheduler.call_later(0, again)
+    scheduler.run()
+    scheduler.run()
+    assert calls == [0, 1]
+
+
+def test_rules_wait_for_their_delay():
+    clock = Clock()
+    level = _Level('delays', (100, 10), 0, transition_width=0)
+    level.add_event('reward', 'print', 'reward')
+    level.add_rule('zone', 'reward', 'reward', 2)
+    level.add_event('fast', 'print', 'fast')
+    level.add_rule('velocity', 'fast', 'above', 5, 1)
+    table = Rule.RuleTable(level.rules, Scheduler(clock))
+
+    table.check('reward', 10, 0, 0)
+    clock.now = 1.5
+    table.check('reward', 10, 0, 0)
+    assert level.events['fast'].trigger_count == 1
+    assert level.events['reward'].trigger_count == 0
+
+    # Slowing down starts the wait of the velocity rule again
+    table.check('reward', 0, 0, 0)
+    clock.now = 2
+    table.check('reward', 10, 0, 0)
+    assert level.events['reward'].trigger_count == 1
+    clock.now = 5
+    table.check('reward', 0, 0, 0)
+    assert level.events['fast'].trigger_count == 1
+    assert level.events['reward'].trigger_count == 1
+
+    # Leaving the zone cancels the wait of the zone rule
+    table.check('corridor', 0, 0, 0)
+    table.check('reward', 0, 0, 0)
+    clock.now = 6
+    table.check('corridor', 0, 0, 0)
+    clock.now = 100
+    table.check('corridor', 0, 0, 0)
+    assert level.events['reward'].trigger_count == 1
+    assert level.rules[0].deadline is None
+    # The velocity rule counts its delay from the last slow check
+    assert table.scheduler.next_deadline == 101
@@ -0,0 +1,107 @@
+""" Test functions for the parts of a Session that don't need a Gramophone """
+import threading
+from types import SimpleNamespace
+
+from GramophoneTools.LinMaze.Level import LevelCollection
+from GramophoneTools.LinMaze.LinMaze import Session, VRLog
+from GramophoneTools.LinMaze.Tools.Stopwatch import Stopwatch
+
+
+def unit_session(lengths, screen_width):
+    session = Session.__new__(Session)
+    session.collection = SimpleNamespace(screen_width=screen_width)
+    session.camera = 0
+    session.vr_units = []
+    offset = 0
+    for length in lengths:
+        session.vr_units.append({"length": length, "offset": offset})
+        offset += length
+    session.index_vr_units()
+    return session
+
+
+def move(session, distance):
+    session.camera -= distance
+
+
+def brute_force(session):
+    width = session.collection.screen_width
+    visible = []
+    for vru in session.vr_units:
+        position = session.camera + vru["offset"]
+        if position < width and position + vru["length"] > 0:
+            visible.append(vru)
+    return visible
+
+
+def test_visible_units():
+    session = unit_session([300, 200, 500, 100, 100, 400] * 50, 640)
+    for distance in [0, 1, 299, 300, 301, 150, 640, 77.5, 1000, 3000]:
+        move(session, distance)
+        assert session.visible_units() == brute_force(session)
+        assert 1 <= len(session.visible_units()) <= 8
+
+
+def test_nearby_textures():
+    # A level of 1400 pixels after another unit, and its dummy frame
+    session = unit_session([1000, 200, 300, 300, 300, 300, 640], 640)
+    for index, vru in enumerate(session.vr_units):
+        vru["texture_id"] = index
+    session.collection.active_level = SimpleNamespace(offset=1000, length=1400)
+    session.prefetch_distance = 100
+
+    session.camera = -1000 - 400  # Units 2, 3 and 4 are on the screen
+    assert session.nearby_textures()[:3] == [2, 3, 4]
+    assert set(session.nearby_textures()) == {2, 3, 4, 5}
+
+    # Near the end the beginning of the level is needed after looping
+    session.camera = -1000 - 1100
+    assert set(session.nearby_textures()) == {1, 2, 4, 5, 6}
+
+    # and near the beginning the end is needed when moving backwards
+    session.camera = -1000 - 50
+    assert set(session.nearby_textures()) == {1, 2, 3, 5, 6}
+
+
+def test_log_written_in_background(tmp_path, monkeypatch):
+    collection = LevelCollection('log', 50, (100, 10))
+    collection.level_list = []
+    level = collection.create_level('a', transition_width=0)
+    level.add_block('checkerboard', length=300, zone_type='reward')
+    level.add_block('checkerboard', length=300)
+    collection.active_level = level
+
+    session = Session.__new__(Session)
+    session.collection = collection
+    session.filename = str(tmp_path / 'log.vrl')
+    session.start_time, session.start_time_hr = 0, ''
+    session.runtime_limit = session.left_monitor = None
+    session.right_monitor = session.gramophone_serial = None
+    session.vel_ratio = 1
+    session.runtime = Stopwatch()
+    session.virtual_relative_position = 100
+    session.current_zone = level.zones[0]
+    session.teleported = session.paused = False
+
+    log = VRLog(session)
+    writers = set()
+    flush = log.flush
+
+    def watched_flush(record, field_name):
+        writers.add(threading.current_thread())
+        flush(record, field_name)
+
+    monkeypatch.setattr(log, 'flush', watched_flush)
+    log.start()
+    for num in range(1300):
+        log.make_entry(1, num, 0, 0, 0, 0, 0, 0)
+    assert len(log.time_record) == 100  # 2 batches were handed over
+    log.stop()
+
+    # Even the last entries are written by the background thread
+    assert len(writers) == 1 and threading.main_thread() not in writers
+    assert list(log.vrl['g_time'][:]) == list(range(1300))
+    assert log.vrl['zone'].shape == (1300, 2)
+    assert list(log.vrl['zone'][0]) == [1, 0]
+    assert log.vrl['zone_types/reward'].shape == (1300,)
+    log.close()
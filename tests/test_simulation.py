@@ -0,0 +1,143 @@
+""" Test functions for stepping a Session at a fixed tick rate """
+from time import monotonic
+
+import pyglet
+
+from GramophoneTools.Comms import Sample
+from GramophoneTools.LinMaze.Level import LevelCollection
+from GramophoneTools.LinMaze.LinMaze import Session
+from GramophoneTools.LinMaze.Simulation import Simulation, values_at
+
+
+def reading(time, encpos):
+    return {'TIME': time, 'ENCPOS': encpos, 'DI-1': 0, 'DI-2': 0,
+            'DO-1': 0, 'DO-2': 0, 'DO-3': 0, 'DO-4': 0}
+
+
+def run(sample_times, tick_rate=60):
+    """ The values of every tick for an animal running 3 encoder steps
+    per clock unit, read at the given times. """
+    ticks = []
+
+    def step(values):
+        ticks.append(values)
+        return 0, 0
+
+    simulation = Simulation(step, lambda *key: None, tick_rate)
+    for time in sample_times:
+        simulation.feed(Sample(monotonic(), reading(time, 3 * time)))
+    return ticks
+
+
+def test_values_at():
+    before, after = reading(100, 0), reading(200, 1000)
+    after['DI-1'] = 1
+    assert values_at(before, after, 150) == dict(reading(100, 500),
+                                                 TICK_TIME=150)
+    assert values_at(before, after, 200)['DI-1'] == 1
+
+
+def test_logged_time_is_read():
+    # The time between two reads is not a value of the Gramophone's
+    # clock, so it is not logged as one
+    values = values_at(reading(100, 0), reading(101, 0), 100.4)
+    assert values['TIME'] == 100
+    assert values['TICK_TIME'] == 100.4
+
+
+def test_ticks_follow_the_clock():
+    # One second of the Gramophone's clock, read regularly or irregularly
+    regular = run(range(0, 10001, 50))
+    irregular = run([0, 7, 400, 401, 2950, 3000, 6666, 9000, 9999, 10000])
+    assert len(regular) == 60
+    # Only the time of the read before the tick depends on the reads
+    for values in regular + irregular:
+        del values['TIME']
+    assert regular == irregular
+    assert [values['ENCPOS'] for values in regular[:3]] == [500, 1000, 1500]
+    assert len(run(range(0, 10001, 50), tick_rate=144)) == 144
+
+
+def test_camera_between_ticks():
+    simulation = Simulation(lambda values: (-100, -110), lambda *key: None)
+    assert simulation.camera(Sample(monotonic(), reading(0, 0))) is None
+    simulation.feed(Sample(monotonic(), reading(0, 0)))
+    simulation.feed(Sample(monotonic(), reading(200, 0)))
+
+    tick_time = simulation.state[0]
+    half_tick = tick_time + simulation.tick_period / 2
+    assert abs(simulation.camera(Sample(monotonic(), reading(half_tick, 0))) + 105) < 0.1
+    assert simulation.camera(Sample(monotonic(), reading(tick_time + 1000, 0))) == -110
+
+
+def test_step_and_keys():
+    collection = LevelCollection('steps', 50, (100, 10))
+    collection.level_list = []
+    level = collection.create_level('a', transition_width=0)
+    level.add_block('checkerboard', length=300)
+    level.add_block('checkerboard', length=200)
+    collection.active_level = level
+
+    session = Session.__new__(Session)
+    session.collection = collection
+    session.calculate_level_offsets()
+    session.vel_ratio, session.manual_vel, session.last_position = 1, 0, 0
+    session.position = 0
+    session.paused, session.skip_save = False, True
+    session.simulation = Simulation(session.step, session.press_key)
+    session.make_rule_tables()
+
+    # 14400 encoder steps are a pixel
+    assert session.step(reading(0, 14400 * 10)) == (0, -10)
+    assert session.step(reading(0, 14400 * 30)) == (-10, -30)
+    assert session.current_zone.zone_type == 'generic'
+
+    # Looping around the end of the level is a jump
+    session.position = -495
+    previous, current = session.step(reading(0, 14400 * 40))
+    assert previous == current == -5
+
+    # A queued key press is handled at the next tick
+    session.simulation.keys.put((pyglet.window.key.SPACE, 0))
+    session.simulation.tick(dict(reading(0, 14400 * 50), TICK_TIME=0))
+    assert session.paused
+
+
+def test_rule_delays_follow_the_clock():
+    def triggered_tick(sample_times):
+        """ The tick a 0.1 sec zone rule triggers at, with the rules
+        stepped by a Session. """
+        collection = LevelCollection('delays', 50, (100, 10))
+        collection.level_list = []
+        level = collection.create_level('a', transition_width=0)
+        level.add_block('checkerboard', length=1000, zone_type='reward')
+        level.add_event('reward', 'print', 'reward')
+        level.add_rule('zone', 'reward', 'reward', 0.1)
+        collection.active_level = level
+
+        session = Session.__new__(Session)
+        session.collection = collection
+        session.calculate_level_offsets()
+        session.vel_ratio, session.manual_vel, session.last_position = 1, 0, 0
+        session.position, session.last_read = 0, None
+        session.paused, session.skip_save = False, True
+        session.current_zone = level.zones[0]
+        session.make_rule_tables()
+        ticks = []
+
+        def step(values):
+            session.step(values)
+            ticks.append(level.events['reward'].trigger_count)
+            return 0, 0
+
+        simulation = Simulation(step, session.press_key)
+        session.simulation = simulation
+        for time in sample_times:
+            simulation.feed(Sample(monotonic(), reading(time, 0)))
+        return ticks.index(1)
+
+    # The same second of the Gramophone's clock, read in many or few parts.
+    # The zone is entered at the first tick, the 6th tick is 0.1 sec later.
+    tick = triggered_tick(range(0, 10001, 50))
+    assert tick == triggered_tick([0, 5000, 10000])
+    assert tick in [6, 7]
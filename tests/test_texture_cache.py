@@ -0,0 +1,60 @@
+""" Test functions for the texture cache of LinMaze Frames """
+import os
+
+import numpy as np
+
+from GramophoneTools.LinMaze import Frame
+from GramophoneTools.LinMaze.Tools.TextureCache import TextureCache
+
+
+def test_store_and_load(tmp_path):
+    cache = TextureCache(str(tmp_path))
+    texture = np.arange(60, dtype=np.uint8).reshape(4, 5, 3)
+    assert cache.load('tex') is None
+
+    cache.store('tex', texture)
+    loaded = cache.load('tex')
+    np.testing.assert_array_equal(loaded, texture)
+
+    loaded[0, 0, 0] = 255  # copy on write, the file stays the same
+    np.testing.assert_array_equal(cache.load('tex'), texture)
+
+
+def test_least_recently_used_evicted(tmp_path):
+    texture = np.zeros((10, 10, 3), dtype=np.uint8)
+    cache = TextureCache(str(tmp_path), size_limit=3 * (texture.nbytes + 128))
+    for i, key in enumerate(['a', 'b', 'c']):
+        cache.store(key, texture)
+        os.utime(cache.path(key), (i, i))
+    cache.load('a')
+
+    cache.store('d', texture)
+    assert cache.load('b') is None
+    for key in ['a', 'c', 'd']:
+        assert cache.load(key) is not None
+    assert cache.size <= cache.size_limit
+
+
+def test_frame_cache_keys():
+    grating = Frame.SineWave(100, 50, 20, 45)
+    assert grating.cache_key == Frame.SineWave(100, 50, 20, 45).cache_key
+    assert grating.cache_key != Frame.SineWave(100, 50, 20, 30).cache_key
+
+    tinted = Frame.SineWave(100, 50, 20, 45)
+    tinted.rgb = (1, 0.5, 1)
+    assert grating.cache_key == tinted.cache_key  # Tinted when drawn
+
+    assert Frame.Cloud(100, 50, None).cache_key is None
+    assert Frame.Cloud(100, 50, 1).cache_key is not None
+
+
+def test_ext_make_uses_cache(tmp_path):
+    previous = Frame.texture_cache
+    Frame.set_texture_cache(TextureCache(str(tmp_path)))
+    try:
+        made = Frame.Frame.ext_make(Frame.Checkerboard(40, 30, 5))
+        loaded = Frame.Frame.ext_make(Frame.Checkerboard(40, 30, 5))
+        assert loaded.frame is None  # not rendered again
+        np.testing.assert_array_equal(made.texture, loaded.texture)
+    finally:
+        Frame.set_texture_cache(previous)
@@ -0,0 +1,26 @@
+""" Test functions for sharing identical textures """
+import numpy as np
+
+from GramophoneTools.LinMaze.Tools.TextureRegistry import TextureRegistry
+
+
+def test_identical_textures_uploaded_once():
+    uploaded = []
+
+    def upload(texture):
+        assert texture.flags.c_contiguous
+        uploaded.append(texture)
+        return len(uploaded)
+
+    registry = TextureRegistry(upload)
+    strip = np.arange(240, dtype=np.uint8).reshape(10, 24)
+    first = registry.register(strip[:, :12])
+    second = registry.register(strip[:, 12:])
+    again = registry.register(strip[:, :12].copy())
+    transposed = registry.register(np.ascontiguousarray(strip[:, :12].reshape(12, 10)))
+
+    assert first == again
+    assert len({first, second, transposed}) == 3
+    assert len(registry) == len(uploaded) == 3
+    assert registry.requested_bytes == 4 * 120
+    assert registry.saved_bytes == 120
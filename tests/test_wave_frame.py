@@ -0,0 +1,45 @@
+""" Regression tests for the grating Frames """
+import math
+
+import numpy as np
+import pytest
+
+from GramophoneTools.LinMaze import Frame
+
+
+def per_pixel_make(self):
+    """ WaveFrame.make as it was before vectorization. """
+    self.frame = np.zeros((self.height, self.width))
+
+    def norm(x, y):
+        return abs(math.sin(self.angle) * y + math.cos(self.angle) * x)
+
+    for [y, x], _ in np.ndenumerate(self.frame):
+        val = norm(x, y)
+        val %= self.wavelength
+        if val % 1:
+            below = math.floor(val)
+            above = math.ceil(val)
+            if above == self.wavelength:
+                above = 0
+            val = (1 - (val % 1)) * \
+                self.wave_temp[below] + (val % 1) * self.wave_temp[above]
+        else:
+            val = self.wave_temp[int(val)]
+        self.frame[y, x] = val
+
+    Frame.Frame.make(self)
+
+
+@pytest.mark.parametrize('frame_type', [Frame.SineWave, Frame.SquareWave])
+@pytest.mark.parametrize('wavelength, angle', [
+    (150, 0), (150, 45), (150, 315), (20, -45), (7, 30.5), (33, 90)])
+def test_same_as_per_pixel(monkeypatch, frame_type, wavelength, angle):
+    vectorized = frame_type(231, 67, wavelength, angle)
+    vectorized.make()
+
+    monkeypatch.setattr(Frame.WaveFrame, 'make', per_pixel_make)
+    per_pixel = frame_type(231, 67, wavelength, angle)
+    per_pixel.make()
+
+    np.testing.assert_array_equal(vectorized.texture, per_pixel.texture)
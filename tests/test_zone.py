@@ -0,0 +1,40 @@
+""" Test functions for finding the zone of a position """
+from GramophoneTools.LinMaze.Level import _Level
+from GramophoneTools.LinMaze.Zone import Zone, ZoneIndex
+
+
+def make_zones(lengths):
+    zones, offset = [], 0
+    for length in lengths:
+        zones.append(Zone(offset, length))
+        offset += length
+    return zones
+
+
+def test_half_open():
+    first, second = make_zones([100, 50])
+    assert first.check(0) and first.check(99.5)
+    assert not first.check(100) and second.check(100)
+    assert not second.check(150)
+
+
+def test_find():
+    zones = make_zones([3, 1, 7, 2, 2, 10] * 40)
+    index = ZoneIndex(zones)
+    for pos in [0, 0.5, 2.99, 3, 3.5, 4, 50, 49, 49.9, 50, 999, 999.9]:
+        expected = [zone for zone in zones if zone.check(pos)]
+        assert [index.find(pos)] == expected
+    assert index.find(-1) is None and index.find(1000) is None
+    assert index.length == 1000
+
+
+def test_level_index():
+    level = _Level('zones', (100, 10), 0, transition_width=0)
+    level.add_block('checkerboard', length=300, zone_type='start')
+    level.add_block('checkerboard', length=200, zone_type='reward')
+    assert level.zone_index.find(300).zone_type == 'reward'
+    assert level.length == 500
+
+    level.add_block('checkerboard', length=50, zone_type='end')
+    assert level.zone_index.find(520).zone_type == 'end'
+    assert level.length == 550